@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import random
+import string
+import time
+from typing import List
+
+from src.events import Event, EventType
+from src.frames import ContextFrame
+from src.manager import ContextWindowManager, RenderMode
+from src.signals import SignalKind, SignalRegistry, SignalRule
+
+
+def _word(rnd: random.Random) -> str:
+    return "".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(4, 9)))
+
+
+def _events(rnd: random.Random, n: int) -> List[Event]:
+    kinds = [EventType.OBSERVATION, EventType.MESSAGE, EventType.TOOL_RESULT]
+    out: List[Event] = []
+    for _ in range(n):
+        text = " ".join(_word(rnd) for _ in range(20))
+        out.append(Event(rnd.choice(kinds), {"text": text, "result": text, "from": "user", "tool": "search"}))
+    return out
+
+
+def bench_signal_rules(n_events: int = 5000) -> None:
+    """
+    Events/sec through ContextWindowManager.update as the rule count grows,
+    next to the matcher alone and a naive one-`in`-test-per-rule loop.
+    """
+    print("\nSignal rules: update() throughput vs rule count")
+    print(f"{'rules':>6s} | {'update ev/s':>12s} | {'match us':>9s} | {'naive us':>9s}")
+    rnd = random.Random(0)
+    events = _events(rnd, n_events)
+    kinds = list(SignalKind)
+    for n_rules in (3, 10, 30, 100, 300, 1000, 3000):
+        registry = SignalRegistry.default()
+        registry.extend(
+            SignalRule(f"rule{i}", _word(rnd), kinds[i % len(kinds)]) for i in range(max(0, n_rules - 3))
+        )
+        phrases = [r.phrase for r in registry.rules]
+
+        mgr = ContextWindowManager(signal_rules=registry)
+        t0 = time.perf_counter()
+        for ev in events:
+            mgr.update(ev)
+        ev_s = n_events / (time.perf_counter() - t0)
+
+        texts = [ev.payload["text"] for ev in events]
+        t0 = time.perf_counter()
+        for t in texts:
+            registry.match(t, EventType.OBSERVATION)
+        match_us = (time.perf_counter() - t0) / len(texts) * 1e6
+
+        t0 = time.perf_counter()
+        for t in texts:
+            low = t.lower()
+            [p for p in phrases if p in low]
+        naive_us = (time.perf_counter() - t0) / len(texts) * 1e6
+
+        print(f"{n_rules:>6d} | {ev_s:>12,.0f} | {match_us:>9.2f} | {naive_us:>9.2f}")
+
+
+def _session(rnd: random.Random, n: int) -> List[Event]:
+    # Small vocabulary so duplicates, deadlines and risk flags recur
+    vocab = ["deploy", "config", "deadline", "budget", "cache", "tests", "review", "rollback"]
+    kinds = [EventType.OBSERVATION, EventType.MESSAGE, EventType.TOOL_RESULT, EventType.NOTE, EventType.STATE_UPDATE]
+    out: List[Event] = []
+    for _ in range(n):
+        text = " ".join(rnd.choice(vocab) for _ in range(3))
+        if rnd.random() < 0.05:
+            out.append(Event(EventType.RISK_FLAG, {"reason": text, "level": rnd.random()}))
+        else:
+            payload = {"text": text, "result": text, "from": rnd.choice(["user", "ops"]), "tool": rnd.choice(["search", "shell"])}
+            out.append(Event(rnd.choice(kinds), payload))
+    return out
+
+
+def _drop_render_caches(mgr: ContextWindowManager) -> None:
+    mgr._last_window_key = None
+    for fr in mgr.frames.values():
+        fr._blocks_version = -1
+
+
+def _sorted_topk(fr: ContextFrame, k: int) -> List[int]:
+    # The pre-index topk: a stable reverse sort of the items on every call
+    return [id(it) for it in sorted(fr.items, key=lambda it: (it.salience, it.ts), reverse=True)[:k]]
+
+
+def bench_render_cache(n_events: int = 20_000, batch: int = 8) -> None:
+    """
+    render_context with the window/block caches next to the same manager
+    with both caches dropped before every render, plus one fed through
+    update_many. All three must produce identical windows, and every
+    frame's indexed topk must match a plain sort of its items.
+    """
+    print("\nRender caches: cached vs uncached render_context (asserted equal)")
+    print(f"{'mode':>13s} | {'cached us':>10s} | {'uncached us':>12s} | {'window hits':>11s} | {'renders':>8s}")
+    # (budget_chars, budget_tokens, stable_ttl_steps): a repeat that should hit
+    # the window cache, then one knob changed at a time, which must not
+    configs = [(2000, None, 16), (2000, None, 16), (2000, None, 4), (800, None, 4), (2000, 300, 4)]
+    for mode in (RenderMode.RANKED, RenderMode.PREFIX_STABLE):
+        rnd = random.Random(1)
+        events = _session(rnd, n_events)
+        cached, uncached, batched = (ContextWindowManager(render_mode=mode) for _ in range(3))
+        for mgr in (cached, uncached, batched):
+            mgr.set_goal("ship the release", ["no downtime"])
+        cached_s = uncached_s = 0.0
+        renders = 0
+        for i in range(0, n_events, batch):
+            chunk = events[i : i + batch]
+            for ev in chunk:
+                cached.update(ev)
+                uncached.update(ev)
+            batched.update_many(chunk)
+            for budget_chars, budget_tokens, ttl in configs[: 2 + (i // batch) % (len(configs) - 1)]:
+                if budget_tokens is not None and mode != RenderMode.RANKED:
+                    continue
+                for mgr in (cached, uncached, batched):
+                    mgr.stable_ttl_steps = ttl
+                t0 = time.perf_counter()
+                got = cached.render_context(budget_chars, budget_tokens)["context_window"]
+                cached_s += time.perf_counter() - t0
+                _drop_render_caches(uncached)
+                t0 = time.perf_counter()
+                ref = uncached.render_context(budget_chars, budget_tokens)["context_window"]
+                uncached_s += time.perf_counter() - t0
+                assert got == ref, f"cached window differs from uncached at event {i}"
+                assert batched.render_context(budget_chars, budget_tokens)["context_window"] == ref, (
+                    f"update_many window differs from update() at event {i}"
+                )
+                renders += 1
+            for fr in cached.frames.values():
+                assert [id(it) for it in fr.topk(8)] == _sorted_topk(fr, 8), f"{fr.frame_type.value} topk differs from sort"
+        print(
+            f"{mode.value:>13s} | {cached_s / renders * 1e6:>10.1f} | {uncached_s / renders * 1e6:>12.1f} | "
+            f"{cached._window_hits:>11,d} | {renders:>8,d}"
+        )
+
+
+if __name__ == "__main__":
+    print("A1 – Context Window Manager Benchmarks\n" + "-" * 38)
+    bench_signal_rules()
+    bench_render_cache()
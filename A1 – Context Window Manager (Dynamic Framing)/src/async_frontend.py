@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+
+from src.events import Event
+from src.manager import ContextWindowManager
+
+_EVENT = "event"
+_RENDER = "render"
+_STOP = "stop"
+
+
+class AsyncContextWindowManager:
+    """
+    asyncio front-end for one ContextWindowManager.
+
+    - Producers submit events through a bounded queue (backpressure: update()
+      waits while the queue is full).
+    - A single writer task owns the manager, so its update/render state
+      machine is never touched concurrently and no lock is needed.
+    - render_context() calls that arrive while an identical render is still
+      queued, with no event queued after it, share that one render and get
+      the same snapshot object (treat it as read-only). With `budget=` (an
+      A2 BudgetController, see ContextWindowManager.render_context) only
+      calls passing the same controller are shared, and the shared render
+      is charged once.
+
+    Ordering: every event submitted before a render_context() call is applied
+    before that render.
+    """
+
+    def __init__(self, manager: Optional[ContextWindowManager] = None, max_queue: int = 1024) -> None:
+        self.manager = manager or ContextWindowManager()
+        self._queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self._writer: Optional[asyncio.Task] = None
+        # Render request at the tail of the queue that newcomers may join
+        self._tail_render: Optional[Tuple[Tuple[Any, ...], "asyncio.Future[Dict[str, Any]]"]] = None
+
+        self.events_applied = 0
+        self.render_requests = 0
+        self.renders = 0
+        self.errors = 0
+        self.last_error: Optional[BaseException] = None
+
+    async def __aenter__(self) -> "AsyncContextWindowManager":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    def start(self) -> None:
+        if self._writer is None:
+            self._writer = asyncio.get_running_loop().create_task(self._run())
+
+    async def aclose(self) -> None:
+        """
+        Drain everything already queued, then stop the writer.
+        """
+        if self._writer is None:
+            return
+        await self._queue.put((_STOP, None))
+        await self._writer
+        self._writer = None
+
+    # -----------------------------
+    # Producer API
+    # -----------------------------
+
+    async def update(self, event: Event) -> None:
+        self._tail_render = None
+        await self._queue.put((_EVENT, event))
+
+    async def update_many(self, events: Iterable[Event]) -> None:
+        for ev in events:
+            await self.update(ev)
+
+    async def render_context(
+        self,
+        budget_chars: int = 2000,
+        budget_tokens: Optional[int] = None,
+        budget: Any = None,
+    ) -> Dict[str, Any]:
+        self.render_requests += 1
+        key = (budget_chars, budget_tokens, budget)
+        tail = self._tail_render
+        if tail is not None and tail[0] == key and not tail[1].done():
+            return await asyncio.shield(tail[1])
+
+        fut: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+        self._tail_render = (key, fut)
+        await self._queue.put((_RENDER, (key, fut)))
+        return await asyncio.shield(fut)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "events_applied": self.events_applied,
+            "render_requests": self.render_requests,
+            "renders": self.renders,
+            "coalesced": self.render_requests - self.renders,
+            "errors": self.errors,
+        }
+
+    # -----------------------------
+    # Writer task
+    # -----------------------------
+
+    async def _run(self) -> None:
+        batch: List[Event] = []
+        while True:
+            kind, payload = await self._queue.get()
+            # Drain whatever is already queued without yielding
+            while True:
+                if kind == _EVENT:
+                    batch.append(payload)
+                else:
+                    self._flush(batch)
+                    batch = []
+                    if kind == _STOP:
+                        return
+                    self._render(*payload)
+                try:
+                    kind, payload = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+            self._flush(batch)
+            batch = []
+
+    def _flush(self, batch: List[Event]) -> None:
+        if not batch:
+            return
+        # update_many pulls from the iterator, so after a bad event it can
+        # resume right after it instead of dropping the rest of the batch
+        it = iter(batch)
+        while True:
+            try:
+                self.manager.update_many(it)
+                break
+            except Exception as e:  # a bad event must not kill the writer
+                self.errors += 1
+                self.last_error = e
+        self.events_applied += len(batch)
+
+    def _render(self, key: Tuple[Any, ...], fut: "asyncio.Future[Dict[str, Any]]") -> None:
+        if self._tail_render is not None and self._tail_render[1] is fut:
+            self._tail_render = None
+        if fut.cancelled():
+            return
+        budget_chars, budget_tokens, budget = key
+        try:
+            snapshot = self.manager.render_context(budget_chars=budget_chars, budget_tokens=budget_tokens, budget=budget)
+        except Exception as e:
+            fut.set_exception(e)
+            return
+        self.renders += 1
+        fut.set_result(snapshot)
@@ -2,7 +2,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import bisect
+import heapq
+import itertools
+import sys
 import time
 
 
@@ -15,52 +19,314 @@ class FrameType(str, Enum):
     TOOLS = "TOOLS"
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextItem:
+    # slots (Python 3.10+): managers are pooled by the tens of thousands (see src/pool.py)
     ts: float
     text: str
     salience: float = 0.5             # 0..1
-    ttl_steps: Optional[int] = None   # expires after N render steps
+    ttl_steps: Optional[int] = None   # lifetime in render steps (the manager sets expires_at)
     tags: Tuple[str, ...] = ()
+    expires_at: Optional[int] = None  # absolute render step (set by the manager)
+    flat: str = field(default="", init=False, repr=False, compare=False)
+    # (counter, width) -> tokens in the rendered "- ..." line; allocated on first use
+    line_tokens: Optional[Dict[Tuple[Any, int], int]] = field(default=None, init=False, repr=False, compare=False)
+    hits: int = field(default=0, init=False, compare=False)  # duplicates merged into this item
+
+    def __post_init__(self) -> None:
+        # Normalize once; short() is called on every render
+        self.flat = self.text.replace("\n", " ").strip()
 
     def short(self, width: int = 140) -> str:
-        t = self.text.replace("\n", " ").strip()
+        t = self.flat
         return (t[: width - 1] + "…") if len(t) > width else t
 
+    @property
+    def key(self) -> Tuple[str, Tuple[str, ...]]:
+        # Content address used for dedup within a frame
+        return (self.text, self.tags)
+
+    def line_token_count(self, counter: Callable[[str], int], width: int) -> int:
+        if self.line_tokens is None:
+            self.line_tokens = {}
+        key = (counter, width)
+        n = self.line_tokens.get(key)
+        if n is None:
+            n = counter(f"- {self.short(width)}")
+            self.line_tokens[key] = n
+        return n
+
+
+# (salience, ts, seq, item) -- ascending, so the eviction victims sit at the front
+_RankEntry = Tuple[float, float, int, ContextItem]
+_ENTRY_BYTES = sys.getsizeof((0.0, 0.0, 0, None))
 
-@dataclass
+
+def _entry_bytes(it: ContextItem) -> int:
+    # Index entry + item + its text, as counted by ContextFrame.approx_bytes
+    n = _ENTRY_BYTES + sys.getsizeof(it) + sys.getsizeof(it.text)
+    return n + sys.getsizeof(it.flat) if it.flat is not it.text else n
+
+
+@dataclass(slots=True)
 class ContextFrame:
+    """
+    A salience-indexed frame.
+
+    `items` stays in timestamp order (same as the old list-based frame), while
+    `_ranked` is a sorted index by (salience, ts, insertion seq). Eviction takes
+    a prefix of the index and top-k walks its tail, so neither needs a full sort.
+
+    `version` bumps on every add/eviction/expiry; rendered blocks are cached
+    per (k, width) and thrown away when it changes.
+
+    Items are deduplicated by content (text + tags): adding a duplicate
+    refreshes the existing item (newer ts, longer TTL, max salience, hits + 1)
+    instead of appending a copy.
+
+    Frames do not age items themselves: the manager schedules each item on
+    its `expires_at` render step and removes it with discard().
+    """
     frame_type: FrameType
     items: List[ContextItem] = field(default_factory=list)
     max_items: int = 50
+    _ranked: List[_RankEntry] = field(default_factory=list, init=False, repr=False)
+    _seq: int = field(default=0, init=False, repr=False)
+    _ts_sorted: bool = field(default=True, init=False, repr=False)
+    version: int = field(default=0, init=False)
+    block_hits: int = field(default=0, init=False)
+    block_misses: int = field(default=0, init=False)
+    _blocks: Dict[Tuple[int, int], str] = field(default_factory=dict, init=False, repr=False)
+    _blocks_version: int = field(default=0, init=False, repr=False)
+    _by_key: Dict[Tuple[str, Tuple[str, ...]], ContextItem] = field(default_factory=dict, init=False, repr=False)
+    dedup_hits: int = field(default=0, init=False)
+    _item_bytes: int = field(default=0, init=False, repr=False)  # sum of _entry_bytes over _ranked
 
-    def add(self, item: ContextItem) -> None:
-        self.items.append(item)
+    def __post_init__(self) -> None:
+        initial, self.items = self.items, []
+        for it in initial:
+            existing = self._by_key.get(it.key)
+            if existing is not None:
+                self._refresh(existing, it)
+            else:
+                self._index(it)
+
+    def add(self, item: ContextItem) -> ContextItem:
+        """
+        Returns the item now holding this content: `item` itself, or the
+        existing duplicate it was merged into.
+        """
+        existing = self._by_key.get(item.key)
+        if existing is not None:
+            self._refresh(existing, item)
+            return existing
+
+        self._index(item)
 
         # Guardrail: if too many, drop lowest-salience items
         if len(self.items) > self.max_items:
-            self.items.sort(key=lambda x: (x.salience, x.ts))
             drop_n = max(1, len(self.items) // 5)  # drop ~20%
-            self.items = self.items[drop_n:]
-            self.items.sort(key=lambda x: x.ts)
-
-    def decay_ttls(self) -> None:
-        for it in self.items:
-            if it.ttl_steps is not None:
-                it.ttl_steps -= 1
-
-    def prune_expired(self) -> None:
-        kept: List[ContextItem] = []
-        for it in self.items:
-            if it.ttl_steps is None:
-                kept.append(it)
-            elif it.ttl_steps > 0:
-                kept.append(it)
-        self.items = kept
+            dropped = set()
+            for e in self._ranked[:drop_n]:
+                dropped.add(id(e[3]))
+                del self._by_key[e[3].key]
+                self._item_bytes -= _entry_bytes(e[3])
+            del self._ranked[:drop_n]
+            self.items = [it for it in self.items if id(it) not in dropped]
+            if not self._ts_sorted:
+                # Equal timestamps fall back to salience order, as the old
+                # sort-by-(salience, ts) then sort-by-ts pass produced.
+                self.items.sort(key=lambda x: (x.ts, x.salience))
+                self._ts_sorted = True
+        return item
+
+    def add_many(self, items: List[ContextItem]) -> List[ContextItem]:
+        """
+        Add a batch with a single index rebuild. The overflow guardrail is
+        replayed on a heap, so trims fire at the same points and evict the
+        same items as calling add() once per item. Returns what add() would
+        have returned for each item.
+        """
+        if not items:
+            return []
+        keys = {it.key for it in items}
+        if len(keys) != len(items) or any(k in self._by_key for k in keys):
+            # Duplicates interleave refreshes with trims; replay them in order
+            return [self.add(it) for it in items]
+        entries: List[_RankEntry] = []
+        for it in items:
+            entries.append((it.salience, it.ts, self._seq, it))
+            self._seq += 1
+
+        dropped = set()
+        last_trim = -1
+        n = len(self.items)
+        if n + len(items) > self.max_items:
+            heap = list(self._ranked)  # ascending list is already a valid heap
+            for i, e in enumerate(entries):
+                heapq.heappush(heap, e)
+                n += 1
+                if n > self.max_items:
+                    drop_n = max(1, n // 5)  # drop ~20%
+                    for _ in range(drop_n):
+                        dropped.add(id(heapq.heappop(heap)[3]))
+                    n -= drop_n
+                    last_trim = i
+
+        entries.sort()
+        ranked = self._ranked + entries  # two sorted runs: linear merge
+        ranked.sort()
+        for it in items:
+            self._by_key[it.key] = it
+            self._item_bytes += _entry_bytes(it)
+        if dropped:
+            self._ranked = [e for e in ranked if id(e[3]) not in dropped]
+            for e in ranked:
+                if id(e[3]) in dropped:
+                    del self._by_key[e[3].key]
+                    self._item_bytes -= _entry_bytes(e[3])
+        else:
+            self._ranked = ranked
+
+        head, tail = items[: last_trim + 1], items[last_trim + 1 :]
+        if head:
+            # Everything up to the last trim ends up filtered and ts-ordered
+            ts_sorted = self._ts_sorted
+            prev = self.items[-1] if self.items else None
+            for it in head:
+                if prev is not None and (it.ts, it.salience) < (prev.ts, prev.salience):
+                    ts_sorted = False
+                prev = it
+            kept = [it for it in itertools.chain(self.items, head) if id(it) not in dropped]
+            if not ts_sorted:
+                kept.sort(key=lambda x: (x.ts, x.salience))
+            self.items = kept
+            self._ts_sorted = True
+        for it in tail:
+            if self.items:
+                last = self.items[-1]
+                if (it.ts, it.salience) < (last.ts, last.salience):
+                    self._ts_sorted = False
+            self.items.append(it)
+        self.version += 1
+        return items
+
+    def discard(self, item: ContextItem) -> bool:
+        """
+        Remove one item by identity. Returns False if it is no longer here
+        (e.g. already evicted by the overflow guardrail).
+        """
+        i = bisect.bisect_left(self._ranked, (item.salience, item.ts))
+        while i < len(self._ranked) and self._ranked[i][3] is not item:
+            if self._ranked[i][0] != item.salience or self._ranked[i][1] != item.ts:
+                return False
+            i += 1
+        if i == len(self._ranked):
+            return False
+        del self._ranked[i]
+
+        j = self._ts_position(item) if self._ts_sorted else 0
+        while self.items[j] is not item:
+            j += 1
+        del self.items[j]
+        del self._by_key[item.key]
+        self._item_bytes -= _entry_bytes(item)
+        self.version += 1
+        return True
+
+    def approx_bytes(self) -> int:
+        """
+        Rough resident size: frame, both item lists, index entries, items and
+        their text (tags are interned, so not counted per item). The per-item
+        part is kept up to date on every add/evict/expire, so this is O(1)
+        in the number of items.
+        """
+        n = sys.getsizeof(self) + sys.getsizeof(self.items) + sys.getsizeof(self._ranked) + self._item_bytes
+        return n + sum(sys.getsizeof(b) for b in self._blocks.values())
 
     def topk(self, k: int) -> List[ContextItem]:
-        ranked = sorted(self.items, key=lambda x: (x.salience, x.ts), reverse=True)
-        return ranked[:k]
+        # Highest (salience, ts) first; exact ties keep insertion order, which
+        # is what the stable reverse sort of the old implementation gave.
+        out: List[ContextItem] = []
+        i = len(self._ranked)
+        while i > 0 and len(out) < k:
+            sal, ts = self._ranked[i - 1][0], self._ranked[i - 1][1]
+            j = i - 1
+            while j > 0 and self._ranked[j - 1][0] == sal and self._ranked[j - 1][1] == ts:
+                j -= 1
+            out.extend(e[3] for e in self._ranked[j:i])
+            i = j
+        return out[:k]
+
+    def block(self, k: int, width: int) -> str:
+        """
+        Rendered "[FRAME]\n- item\n..." block for the top-k items, or "" if
+        the frame is empty. Cached until the frame changes.
+        """
+        if self._blocks_version != self.version:
+            self._blocks.clear()
+            self._blocks_version = self.version
+        key = (k, width)
+        cached = self._blocks.get(key)
+        if cached is not None:
+            self.block_hits += 1
+            return cached
+        self.block_misses += 1
+        lines = [f"- {it.short(width)}" for it in self.topk(k)]
+        block = f"[{self.frame_type.value}]\n" + "\n".join(lines) + "\n" if lines else ""
+        self._blocks[key] = block
+        return block
+
+    def _ts_position(self, item: ContextItem) -> int:
+        # First position whose ts is >= item.ts (items are ts-ordered here)
+        lo, hi = 0, len(self.items)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.items[mid].ts < item.ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _refresh(self, existing: ContextItem, dup: ContextItem) -> None:
+        self.discard(existing)  # re-indexed below under its new (salience, ts)
+        existing.ts = max(existing.ts, dup.ts)
+        existing.salience = max(existing.salience, dup.salience)
+        if existing.ttl_steps is not None:
+            if dup.ttl_steps is None or (dup.expires_at or 0) >= (existing.expires_at or 0):
+                existing.ttl_steps = dup.ttl_steps
+                existing.expires_at = dup.expires_at
+        existing.hits += 1
+        self.dedup_hits += 1
+        self._index(existing)
+
+    def _index(self, item: ContextItem) -> None:
+        if self.items:
+            last = self.items[-1]
+            if (item.ts, item.salience) < (last.ts, last.salience):
+                self._ts_sorted = False
+        self.items.append(item)
+        self._by_key[item.key] = item
+        self._item_bytes += _entry_bytes(item)
+        bisect.insort(self._ranked, (item.salience, item.ts, self._seq, item))
+        self._seq += 1
+        self.version += 1
+
+
+# Shared tag tuples: the same few combinations repeat across every item
+_TAGS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_TAGS_MAX = 4096
+
+
+def intern_tags(tags: Tuple[str, ...]) -> Tuple[str, ...]:
+    cached = _TAGS.get(tags)
+    if cached is not None:
+        return cached
+    if len(_TAGS) >= _TAGS_MAX:
+        _TAGS.clear()
+    tags = tuple(sys.intern(t) for t in tags)
+    _TAGS[tags] = tags
+    return tags
 
 
 def make_item(
@@ -69,4 +335,10 @@ def make_item(
     ttl_steps: Optional[int] = None,
     tags: Tuple[str, ...] = (),
 ) -> ContextItem:
-    return ContextItem(ts=time.time(), text=text.strip(), salience=salience, ttl_steps=ttl_steps, tags=tags)
+    return ContextItem(
+        ts=time.time(),
+        text=sys.intern(text.strip()),
+        salience=salience,
+        ttl_steps=ttl_steps,
+        tags=intern_tags(tags),
+    )
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+import itertools
+import os
+import sys
 
 from src.events import Event, EventType
-from src.frames import FrameType, ContextFrame, make_item
+from src.frames import FrameType, ContextFrame, ContextItem, make_item
+from src.render_policy import DEFAULT_RENDER_POLICIES, RenderPolicy, policy_for_mode, render_units
+from src.signals import DEFAULT_SIGNAL_RULES, SignalKind, SignalRegistry
+from src.tokens import TokenCounter, approx_token_count
 
 
 @dataclass
@@ -13,24 +20,66 @@ class ForegroundDecision:
     reason: str
 
 
+class RenderMode(str, Enum):
+    # Blocks ordered by foreground and items by salience rank (default)
+    RANKED = "RANKED"
+    # Stable content first, volatile content in an append-only tail, so the
+    # rendered prompt keeps a long common prefix between turns (LLM prefix cache)
+    PREFIX_STABLE = "PREFIX_STABLE"
+
+
 class ContextWindowManager:
     """
     Maintains multiple context frames and produces a bounded context window.
     """
 
-    def __init__(self) -> None:
+    # PREFIX_STABLE tail blocks, roughly from least to most frequently touched
+    _PREFIX_TAIL_ORDER = (FrameType.STATE, FrameType.SOCIAL, FrameType.TOOLS, FrameType.TEMPORAL)
+
+    def __init__(
+        self,
+        render_mode: RenderMode = RenderMode.RANKED,
+        stable_ttl_steps: int = 16,
+        token_counter: Optional[TokenCounter] = None,
+        signal_rules: Optional[SignalRegistry] = None,
+        render_policies: Optional[Mapping[str, RenderPolicy]] = None,
+        render_charge: Callable[[int], int] = render_units,
+    ) -> None:
         self.frames: Dict[FrameType, ContextFrame] = {ft: ContextFrame(ft) for ft in FrameType}
 
         self._render_step = 0
+        # Timing wheel: render step -> frame -> items that expire on that step
+        self._expiry_wheel: Dict[int, Dict[FrameType, List[ContextItem]]] = {}
         self._goal: Optional[str] = None
         self._constraints: List[str] = []
 
+        # Render cache: reuse the last window when nothing it depends on changed
+        self._last_window_key: Optional[Tuple[Any, ...]] = None
+        self._last_window: str = ""
+        self._window_hits = 0
+
+        self.render_mode = render_mode
+        # PREFIX_STABLE: items living at least this many renders go in the stable head
+        self.stable_ttl_steps = stable_ttl_steps
+        # Used when render_context is given budget_tokens
+        self.token_counter: TokenCounter = token_counter or approx_token_count
+        self._last_tokens_used: Optional[int] = None
+        # Deadline/risk/escalation phrases scanned in event text
+        self.signal_rules = signal_rules or DEFAULT_SIGNAL_RULES
+        # Budget mode -> window size policy, and rendered tokens -> units charged
+        self.render_policies: Mapping[str, RenderPolicy] = render_policies or DEFAULT_RENDER_POLICIES
+        self.render_charge = render_charge
+
         # Signals (simple state)
         self._risk_hot: bool = False
         self._urgent_deadline: Optional[str] = None
+        self._escalation: Optional[str] = None
         self._last_tool: Optional[str] = None
         self._last_sender: Optional[str] = None
 
+        # Per-frame item buffers while a batch is being routed (see update_many)
+        self._pending: Optional[Dict[FrameType, List[ContextItem]]] = None
+
     # -----------------------------
     # Public API
     # -----------------------------
@@ -41,63 +90,45 @@ class ContextWindowManager:
         self.update(Event(EventType.GOAL_SET, {"goal": self._goal, "constraints": self._constraints}))
 
     def update(self, event: Event) -> None:
-        et = event.event_type
-        p = event.payload
-
-        if et == EventType.GOAL_SET:
-            goal = p.get("goal", "")
-            constraints = p.get("constraints", [])
-            txt = f"Goal: {goal}"
-            if constraints:
-                txt += "\nConstraints:\n" + "\n".join([f"- {c}" for c in constraints])
-            self._add(FrameType.TASK, txt, salience=0.95, tags=("goal",))
-
-        elif et == EventType.MESSAGE:
-            sender = p.get("from", "unknown")
-            msg = p.get("text", "")
-            self._last_sender = sender
-            txt = f"Message from {sender}: {msg}"
-            self._add(FrameType.SOCIAL, txt, salience=0.75, ttl_steps=8, tags=("message", sender))
-            self._add(FrameType.TEMPORAL, f"Received message from {sender}.", salience=0.4, ttl_steps=6)
-
-        elif et == EventType.OBSERVATION:
-            obs = p.get("text", "")
-            urgency = float(p.get("urgency", 0.3))
-            txt = f"Observation: {obs}"
-            self._add(FrameType.STATE, txt, salience=min(1.0, 0.55 + urgency * 0.4), ttl_steps=10, tags=("obs",))
-
-            low = obs.lower()
-            if "deadline" in low or "due" in low or "by " in low:
-                self._urgent_deadline = obs
-                self._add(FrameType.TEMPORAL, f"Deadline signal: {obs}", salience=0.8, ttl_steps=12, tags=("deadline",))
-
-        elif et == EventType.STATE_UPDATE:
-            state = p.get("text", "")
-            txt = f"State update: {state}"
-            self._add(FrameType.STATE, txt, salience=0.6, ttl_steps=12, tags=("state",))
+        signals: Dict[str, Any] = {}
+        try:
+            self._route(event, signals)
+        finally:
+            self._set_signals(signals)
 
-        elif et == EventType.TOOL_RESULT:
-            tool = p.get("tool", "tool")
-            result = p.get("result", "")
-            self._last_tool = tool
-            txt = f"Tool result ({tool}): {result}"
-            self._add(FrameType.TOOLS, txt, salience=0.7, ttl_steps=10, tags=("tool", tool))
-            self._add(FrameType.TEMPORAL, f"Used tool: {tool}.", salience=0.45, ttl_steps=6, tags=("tool_use",))
-
-        elif et == EventType.RISK_FLAG:
-            reason = p.get("reason", "risk flagged")
-            level = float(p.get("level", 0.8))
-            if level >= 0.6:
-                self._risk_hot = True
-            txt = f"RISK: {reason} (level={level:.2f})"
-            self._add(FrameType.RISK, txt, salience=min(1.0, 0.7 + level * 0.3), ttl_steps=20, tags=("risk",))
-
-        elif et == EventType.NOTE:
-            note = p.get("text", "")
-            self._add(FrameType.TEMPORAL, f"Note: {note}", salience=0.35, ttl_steps=8, tags=("note",))
-
-        else:
-            self._add(FrameType.TEMPORAL, f"Unhandled event: {et}", salience=0.2, ttl_steps=3)
+    def update_many(self, events: Iterable[Event]) -> None:
+        """
+        Ingest a batch of events. Items are routed to per-frame buffers first,
+        then each frame absorbs its buffer in one add_many (one overflow pass),
+        and signals are set once from the final state of the batch.
+        Results are identical to calling update() on each event in order.
+        """
+        signals: Dict[str, Any] = {}
+        self._pending = {}
+        try:
+            for event in events:
+                self._route(event, signals)
+        finally:
+            pending, self._pending = self._pending, None
+            for ft, items in pending.items():
+                for item, kept in zip(items, self.frames[ft].add_many(items)):
+                    self._schedule_expiry(ft, item, kept)
+            self._set_signals(signals)
+
+    def ingest(self, stream: Iterable[Event], batch_size: int = 256) -> int:
+        """
+        Drain an event iterator in update_many batches. Returns events ingested.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be > 0")
+        it = iter(stream)
+        n = 0
+        while True:
+            batch = list(itertools.islice(it, batch_size))
+            if not batch:
+                return n
+            self.update_many(batch)
+            n += len(batch)
 
     def choose_foreground(self) -> ForegroundDecision:
         """
@@ -110,6 +141,9 @@ class ContextWindowManager:
         if self._urgent_deadline is not None:
             return ForegroundDecision(FrameType.TEMPORAL, "Deadline/urgency detected: temporal framing prioritized.")
 
+        if self._escalation is not None and len(self.frames[FrameType.SOCIAL].items) > 0:
+            return ForegroundDecision(FrameType.SOCIAL, "Escalation detected: social framing prioritized.")
+
         if self._last_tool is not None and len(self.frames[FrameType.TOOLS].items) > 0:
             return ForegroundDecision(FrameType.TOOLS, "Tool result present: focus on interpreting tool output.")
 
@@ -121,16 +155,78 @@ class ContextWindowManager:
 
         return ForegroundDecision(FrameType.STATE, "No explicit goal: fall back to state framing.")
 
-    def render_context(self, budget_chars: int = 2000) -> Dict[str, Any]:
+    def render_context(
+        self,
+        budget_chars: int = 2000,
+        budget_tokens: Optional[int] = None,
+        budget: Any = None,
+    ) -> Dict[str, Any]:
+        """
+        With budget_tokens set, budget_chars is ignored and the window is
+        packed item by item to maximize total salience within the token
+        budget (RANKED mode only).
+
+        `budget` is an A2 BudgetController (anything with `.budget.mode` and
+        `.spend(op, meta=None, cost=None)`). Its mode picks the render policy
+        (smaller k, widths and fewer support frames as the budget runs low)
+        and RENDER_CONTEXT is charged by the tokens actually rendered.
+        """
+        if budget_tokens is not None and self.render_mode != RenderMode.RANKED:
+            raise ValueError("budget_tokens is only supported with RenderMode.RANKED")
         self._render_step += 1
 
-        for fr in self.frames.values():
-            fr.decay_ttls()
-            fr.prune_expired()
+        budget_mode = getattr(budget.budget.mode, "value", budget.budget.mode) if budget is not None else "FULL"
+        policy = policy_for_mode(budget_mode, self.render_policies)
+        if policy.budget_scale != 1.0:
+            budget_chars = int(budget_chars * policy.budget_scale)
+            if budget_tokens is not None:
+                budget_tokens = int(budget_tokens * policy.budget_scale)
+
+        for ft, expiring in self._expiry_wheel.pop(self._render_step, {}).items():
+            fr = self.frames[ft]
+            for it in expiring:
+                if it.expires_at == self._render_step:  # else refreshed by a duplicate since
+                    fr.discard(it)
 
         decision = self.choose_foreground()
 
-        context_text = self._compose_context_window(decision.frame, budget_chars)
+        # Everything the composed window depends on, including the public
+        # knobs a caller may change between renders
+        window_key = (
+            decision.frame,
+            budget_chars,
+            budget_tokens,
+            policy,
+            self.render_mode,
+            self.stable_ttl_steps,
+            self.token_counter,
+            tuple(fr.version for fr in self.frames.values()),
+        )
+        window_hit = window_key == self._last_window_key
+        previous_window = self._last_window
+        if window_hit:
+            self._window_hits += 1
+            context_text = self._last_window
+        else:
+            self._last_tokens_used = None
+            if budget_tokens is not None:
+                context_text, self._last_tokens_used = self._compose_token_packed_window(
+                    decision.frame, budget_tokens, policy
+                )
+            elif self.render_mode == RenderMode.PREFIX_STABLE:
+                context_text = self._compose_prefix_stable_window(decision.frame, budget_chars, policy)
+            else:
+                context_text = self._compose_context_window(decision.frame, budget_chars, policy)
+            self._last_window_key = window_key
+            self._last_window = context_text
+        shared_prefix = len(os.path.commonprefix([previous_window, context_text]))
+
+        charge: Optional[Dict[str, Any]] = None
+        if budget is not None:
+            tokens = self._last_tokens_used if budget_tokens is not None else self.token_counter(context_text)
+            units = self.render_charge(tokens or 0)
+            spent = budget.spend("RENDER_CONTEXT", meta={"render_step": self._render_step, "tokens": tokens}, cost=units)
+            charge = {"mode": budget_mode, "tokens": tokens, "units": units, "allowed": spent.allowed}
 
         snapshot: Dict[str, Any] = {
             "foreground_frame": decision.frame.value,
@@ -139,9 +235,18 @@ class ContextWindowManager:
             "debug": {
                 "render_step": self._render_step,
                 "frames_count": {ft.value: len(fr.items) for ft, fr in self.frames.items()},
+                "dedup_hits": {ft.value: fr.dedup_hits for ft, fr in self.frames.items()},
+                "render_cache": self._render_cache_stats(window_hit),
+                "render_mode": self.render_mode.value,
+                "prefix_shared_chars": shared_prefix,
+                "prefix_shared_ratio": round(shared_prefix / len(context_text), 3) if context_text else 0.0,
+                "budget_tokens": budget_tokens,
+                "tokens_used": self._last_tokens_used,
+                "render_budget": charge,
                 "signals": {
                     "risk_hot": self._risk_hot,
                     "urgent_deadline": self._urgent_deadline,
+                    "escalation": self._escalation,
                     "last_tool": self._last_tool,
                     "last_sender": self._last_sender,
                 },
@@ -151,6 +256,7 @@ class ContextWindowManager:
         # Reset one-step signals
         self._last_tool = None
         self._urgent_deadline = None
+        self._escalation = None
 
         # Risk stays hot until risk frame empties (simple rule)
         if len(self.frames[FrameType.RISK].items) == 0:
@@ -158,10 +264,107 @@ class ContextWindowManager:
 
         return snapshot
 
+    def approx_bytes(self) -> int:
+        """
+        Rough resident size of this manager (frames, items, render cache).
+        """
+        n = sys.getsizeof(self) + sys.getsizeof(self.__dict__) + sys.getsizeof(self._last_window)
+        n += sum(fr.approx_bytes() for fr in self.frames.values())
+        for bucket in self._expiry_wheel.values():
+            n += sys.getsizeof(bucket) + sum(sys.getsizeof(v) for v in bucket.values())
+        return n
+
     # -----------------------------
     # Internal helpers
     # -----------------------------
 
+    def _route(self, event: Event, signals: Dict[str, Any]) -> None:
+        """
+        Turn one event into frame items. Signal changes go into `signals`
+        and are applied by the caller through _set_signals.
+        """
+        et = event.event_type
+        p = event.payload
+
+        if et == EventType.GOAL_SET:
+            goal = p.get("goal", "")
+            constraints = p.get("constraints", [])
+            txt = f"Goal: {goal}"
+            if constraints:
+                txt += "\nConstraints:\n" + "\n".join([f"- {c}" for c in constraints])
+            self._add(FrameType.TASK, txt, salience=0.95, tags=("goal",))
+
+        elif et == EventType.MESSAGE:
+            sender = p.get("from", "unknown")
+            msg = p.get("text", "")
+            signals["last_sender"] = sender
+            txt = f"Message from {sender}: {msg}"
+            self._add(FrameType.SOCIAL, txt, salience=0.75, ttl_steps=8, tags=("message", sender))
+            self._add(FrameType.TEMPORAL, f"Received message from {sender}.", salience=0.4, ttl_steps=6)
+            self._scan_signals(et, msg, signals)
+
+        elif et == EventType.OBSERVATION:
+            obs = p.get("text", "")
+            urgency = float(p.get("urgency", 0.3))
+            txt = f"Observation: {obs}"
+            self._add(FrameType.STATE, txt, salience=min(1.0, 0.55 + urgency * 0.4), ttl_steps=10, tags=("obs",))
+            self._scan_signals(et, obs, signals)
+
+        elif et == EventType.STATE_UPDATE:
+            state = p.get("text", "")
+            txt = f"State update: {state}"
+            self._add(FrameType.STATE, txt, salience=0.6, ttl_steps=12, tags=("state",))
+
+        elif et == EventType.TOOL_RESULT:
+            tool = p.get("tool", "tool")
+            result = p.get("result", "")
+            signals["last_tool"] = tool
+            txt = f"Tool result ({tool}): {result}"
+            self._add(FrameType.TOOLS, txt, salience=0.7, ttl_steps=10, tags=("tool", tool))
+            self._add(FrameType.TEMPORAL, f"Used tool: {tool}.", salience=0.45, ttl_steps=6, tags=("tool_use",))
+            self._scan_signals(et, str(result), signals)
+
+        elif et == EventType.RISK_FLAG:
+            reason = p.get("reason", "risk flagged")
+            level = float(p.get("level", 0.8))
+            if level >= 0.6:
+                signals["risk_hot"] = True
+            txt = f"RISK: {reason} (level={level:.2f})"
+            self._add(FrameType.RISK, txt, salience=min(1.0, 0.7 + level * 0.3), ttl_steps=20, tags=("risk",))
+
+        elif et == EventType.NOTE:
+            note = p.get("text", "")
+            self._add(FrameType.TEMPORAL, f"Note: {note}", salience=0.35, ttl_steps=8, tags=("note",))
+
+        else:
+            self._add(FrameType.TEMPORAL, f"Unhandled event: {et}", salience=0.2, ttl_steps=3)
+
+    def _scan_signals(self, et: EventType, text: str, signals: Dict[str, Any]) -> None:
+        fired = self.signal_rules.match(text, et)
+        if not fired:
+            return
+        if SignalKind.DEADLINE in fired:
+            signals["urgent_deadline"] = text
+            self._add(FrameType.TEMPORAL, f"Deadline signal: {text}", salience=0.8, ttl_steps=12, tags=("deadline",))
+        if SignalKind.RISK in fired:
+            signals["risk_hot"] = True
+            self._add(FrameType.RISK, f"Risk signal: {text}", salience=0.85, ttl_steps=20, tags=("risk",))
+        if SignalKind.ESCALATION in fired:
+            signals["escalation"] = text
+            self._add(FrameType.SOCIAL, f"Escalation: {text}", salience=0.85, ttl_steps=8, tags=("escalation",))
+
+    def _set_signals(self, signals: Dict[str, Any]) -> None:
+        if "risk_hot" in signals:
+            self._risk_hot = True
+        if "urgent_deadline" in signals:
+            self._urgent_deadline = signals["urgent_deadline"]
+        if "escalation" in signals:
+            self._escalation = signals["escalation"]
+        if "last_tool" in signals:
+            self._last_tool = signals["last_tool"]
+        if "last_sender" in signals:
+            self._last_sender = signals["last_sender"]
+
     def _add(
         self,
         frame: FrameType,
@@ -170,35 +373,50 @@ class ContextWindowManager:
         ttl_steps: Optional[int] = None,
         tags: Tuple[str, ...] = (),
     ) -> None:
-        self.frames[frame].add(make_item(text=text, salience=salience, ttl_steps=ttl_steps, tags=tags))
+        item = make_item(text=text, salience=salience, ttl_steps=ttl_steps, tags=tags)
+        if ttl_steps is not None:
+            # Same lifetime as the old decay-then-prune sweep: gone on the
+            # ttl-th render from now, and on the next render if ttl <= 0.
+            item.expires_at = self._render_step + max(1, ttl_steps)
+        if self._pending is not None:
+            self._pending.setdefault(frame, []).append(item)
+        else:
+            self._schedule_expiry(frame, item, self.frames[frame].add(item))
+
+    def _schedule_expiry(self, frame: FrameType, item: ContextItem, kept: ContextItem) -> None:
+        # `kept` is `item`, or the existing duplicate it was merged into; the
+        # duplicate only needs a new wheel slot if it took over item's expiry.
+        if item.expires_at is not None and kept.expires_at == item.expires_at:
+            self._expiry_wheel.setdefault(item.expires_at, {}).setdefault(frame, []).append(kept)
 
-    def _compose_context_window(self, foreground: FrameType, budget_chars: int) -> str:
+    def _compose_context_window(self, foreground: FrameType, budget_chars: int, policy: RenderPolicy) -> str:
         blocks: List[str] = []
         used = 0
 
-        def add_block(title: str, lines: List[str]) -> None:
+        def add_block(block: str) -> bool:
             nonlocal used
-            if not lines:
-                return
-            block = f"[{title}]\n" + "\n".join(lines) + "\n"
+            if not block:
+                return False
             if used + len(block) <= budget_chars:
                 blocks.append(block)
                 used += len(block)
+                return True
+            return False
 
         # Always include TASK if available
-        task_items = self.frames[FrameType.TASK].topk(3)
-        add_block("TASK", [f"- {it.short(400)}" for it in task_items])
+        add_block(self.frames[FrameType.TASK].block(policy.task_k, policy.task_width))
 
         # Foreground frame
-        fg_items = self.frames[foreground].topk(6)
-        add_block(foreground.value, [f"- {it.short(500)}" for it in fg_items])
+        add_block(self.frames[foreground].block(policy.foreground_k, policy.foreground_width))
 
-        # Supporting frames
+        # Supporting frames (at most policy.max_support_frames non-empty blocks)
+        shown = 0
         for sf in self._support_frames(foreground):
             if sf == foreground:
                 continue
-            items = self.frames[sf].topk(3)
-            add_block(sf.value, [f"- {it.short(350)}" for it in items])
+            if shown >= policy.max_support_frames:
+                break
+            shown += add_block(self.frames[sf].block(policy.support_k, policy.support_width))
             if used >= budget_chars * 0.92:
                 break
 
@@ -207,6 +425,166 @@ class ContextWindowManager:
 
         return "\n".join(blocks).strip()
 
+    def _compose_token_packed_window(
+        self,
+        foreground: FrameType,
+        budget_tokens: int,
+        policy: RenderPolicy,
+    ) -> Tuple[str, int]:
+        """
+        0/1 knapsack over the items the ranked layout would consider (same
+        blocks, same per-frame k and widths): weight = line tokens, plus the
+        block header the first time a block is used; value = salience, with a
+        tiny bonus for foreground/support priority order to break ties.
+        Solved exactly on a Pareto frontier of (tokens, value) states.
+        """
+        count = self.token_counter
+        specs = [(FrameType.TASK, policy.task_k, policy.task_width)] if foreground != FrameType.TASK else []
+        specs.append((foreground, policy.foreground_k, policy.foreground_width))
+        # Each frame once (the ranked layout can repeat TASK as a support block)
+        supports = [sf for sf in self._support_frames(foreground) if sf not in (foreground, FrameType.TASK)]
+        supports = [sf for sf in supports if self.frames[sf].items][: policy.max_support_frames]
+        specs += [(sf, policy.support_k, policy.support_width) for sf in supports]
+
+        groups: List[Tuple[FrameType, int, int, List[ContextItem]]] = []
+        for ft, k, width in specs:
+            items = self.frames[ft].topk(k)
+            if items:
+                groups.append((ft, width, count(f"[{ft.value}]"), items))
+        n_items = sum(len(g[3]) for g in groups)
+        eps = 1e-6 / max(1, n_items)
+
+        # State: (tokens, value, picks) where picks is a linked list of (group, idx)
+        State = Tuple[int, float, Any]
+
+        def pareto(states: List[State]) -> List[State]:
+            states.sort(key=lambda st: (st[0], -st[1]))
+            kept: List[State] = []
+            for st in states:
+                if not kept or st[1] > kept[-1][1]:
+                    kept.append(st)
+            return kept
+
+        frontier: List[State] = [(0, 0.0, None)]
+        rank = n_items
+        for gi, (ft, width, header, items) in enumerate(groups):
+            opened: List[State] = []
+            for ii, it in enumerate(items):
+                w = it.line_token_count(count, width)
+                v = it.salience + eps * rank
+                rank -= 1
+                grown = [(c + w, val + v, ((gi, ii), picks)) for c, val, picks in opened if c + w <= budget_tokens]
+                grown += [
+                    (c + header + w, val + v, ((gi, ii), picks))
+                    for c, val, picks in frontier
+                    if c + header + w <= budget_tokens
+                ]
+                opened = pareto(opened + grown)
+            frontier = pareto(frontier + opened)
+
+        picked = set()
+        node = frontier[-1][2]
+        while node is not None:
+            picked.add(node[0])
+            node = node[1]
+
+        while True:
+            blocks: List[str] = []
+            for gi, (ft, width, _, items) in enumerate(groups):
+                lines = [f"- {it.short(width)}" for ii, it in enumerate(items) if (gi, ii) in picked]
+                if lines:
+                    blocks.append(f"[{ft.value}]\n" + "\n".join(lines) + "\n")
+            if not blocks:
+                return "[EMPTY]\nNo context available.\n", 0
+            text = "\n".join(blocks).strip()
+            used = count(text)
+            if used <= budget_tokens:
+                return text, used
+            # Non-additive counter (tokens merged across line breaks): shed the
+            # least valuable pick and re-check
+            picked.remove(min(picked, key=lambda p: (groups[p[0]][3][p[1]].salience, -p[0], -p[1])))
+
+    def _compose_prefix_stable_window(self, foreground: FrameType, budget_chars: int, policy: RenderPolicy) -> str:
+        """
+        PREFIX_STABLE layout, most stable content first:
+          [TASK]        goal/constraints
+          [STABLE]      long-TTL items from the other frames, oldest first
+          [RISK]        risk items, oldest first
+          [<FRAME>]...  short-TTL items, one append-only block per frame in a
+                        fixed order, so an event only disturbs its own block
+          [FOREGROUND]  the current foreground frame, last so a flip only
+                        changes the final line
+
+        The head stops at the first line that does not fit; the tail drops its
+        oldest lines first. The policy sets the TASK k and the line widths.
+        """
+        footer = f"[FOREGROUND] {foreground.value}"
+        used = len(footer)
+        head_full = False
+        blocks: List[str] = []
+
+        def head_block(title: str, lines: List[str]) -> None:
+            nonlocal used, head_full
+            if head_full or not lines:
+                return
+            size = len(title) + 4  # "[title]\n", trailing "\n", join "\n"
+            kept: List[str] = []
+            for line in lines:
+                if used + size + len(line) + 1 > budget_chars:
+                    head_full = True
+                    break
+                kept.append(line)
+                size += len(line) + 1
+            if kept:
+                blocks.append(f"[{title}]\n" + "\n".join(kept) + "\n")
+                used += size
+
+        task = sorted(self.frames[FrameType.TASK].topk(policy.task_k), key=lambda x: x.ts)
+        head_block("TASK", [f"- {it.short(policy.task_width)}" for it in task])
+        width = policy.support_width
+
+        stable: List[Tuple[float, str]] = []
+        recent: List[Tuple[float, FrameType, str]] = []
+        for ft in self._PREFIX_TAIL_ORDER:
+            for it in self.frames[ft].items:
+                if it.ttl_steps is None or it.ttl_steps >= self.stable_ttl_steps:
+                    stable.append((it.ts, f"- ({ft.value}) {it.short(width)}"))
+                else:
+                    recent.append((it.ts, ft, f"- {it.short(width)}"))
+        stable.sort(key=lambda x: x[0])
+        head_block("STABLE", [line for _, line in stable])
+
+        risk = sorted(self.frames[FrameType.RISK].items, key=lambda x: x.ts)
+        head_block("RISK", [f"- {it.short(width)}" for it in risk])
+
+        # Tail: newest lines that fit, regrouped per frame in arrival order
+        recent.sort(key=lambda x: x[0], reverse=True)
+        tail: Dict[FrameType, List[str]] = {}
+        for _, ft, line in recent:
+            cost = len(line) + 1 + (0 if ft in tail else len(ft.value) + 4)
+            if used + cost > budget_chars:
+                break
+            tail.setdefault(ft, []).append(line)
+            used += cost
+        for ft in self._PREFIX_TAIL_ORDER:
+            if ft in tail:
+                blocks.append(f"[{ft.value}]\n" + "\n".join(reversed(tail[ft])) + "\n")
+
+        if not blocks:
+            return "[EMPTY]\nNo context available.\n"
+
+        blocks.append(footer)
+        return "\n".join(blocks).strip()
+
+    def _render_cache_stats(self, window_hit: bool) -> Dict[str, Any]:
+        hits = sum(fr.block_hits for fr in self.frames.values())
+        misses = sum(fr.block_misses for fr in self.frames.values())
+        return {
+            "window_hit": window_hit,
+            "window_hit_rate": round(self._window_hits / self._render_step, 3),
+            "block_hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
+
     def _support_frames(self, foreground: FrameType) -> List[FrameType]:
         if foreground == FrameType.RISK:
             return [FrameType.TASK, FrameType.STATE, FrameType.TEMPORAL, FrameType.SOCIAL, FrameType.TOOLS]
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, Optional
+import hashlib
+import os
+import pickle
+import time
+
+from src.events import Event
+from src.manager import ContextWindowManager
+
+
+class SessionPool:
+    """
+    One ContextWindowManager per live conversation, many per process.
+
+    Sessions are kept in LRU order. When the pool holds more than
+    `max_resident` sessions (or more than `max_bytes` of estimated resident
+    state), the least recently used ones are pickled to `spill_dir` and
+    dropped from memory. The next update/render for a spilled session loads
+    it back transparently.
+
+    Managers must be picklable to spill (the default token counter is; a
+    lambda passed as token_counter is not).
+    """
+
+    def __init__(
+        self,
+        spill_dir: str,
+        max_resident: int = 10_000,
+        max_bytes: Optional[int] = None,
+        factory: Callable[[], ContextWindowManager] = ContextWindowManager,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_resident <= 0:
+            raise ValueError("max_resident must be > 0")
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = spill_dir
+        self.max_resident = max_resident
+        self.max_bytes = max_bytes
+        self.factory = factory
+        self.clock = clock
+
+        # session_id -> manager, least recently used first
+        self._resident: "OrderedDict[Hashable, ContextWindowManager]" = OrderedDict()
+        self._last_used: Dict[Hashable, float] = {}
+        self._bytes: Dict[Hashable, int] = {}
+        self._resident_bytes = 0
+        self._spilled: Dict[Hashable, str] = {}
+
+        self.spills = 0
+        self.rehydrations = 0
+        self._rehydrate_ms: Deque[float] = deque(maxlen=1000)
+
+    # -----------------------------
+    # Session API
+    # -----------------------------
+
+    def get(self, session_id: Hashable) -> ContextWindowManager:
+        """
+        Resident manager for session_id: cached, rehydrated from disk, or new.
+        """
+        mgr = self._resident.get(session_id)
+        if mgr is not None:
+            self._resident.move_to_end(session_id)
+        elif session_id in self._spilled:
+            mgr = self._rehydrate(session_id)
+        else:
+            mgr = self.factory()
+            self._resident[session_id] = mgr
+        self._last_used[session_id] = self.clock()
+        return mgr
+
+    def update(self, session_id: Hashable, event: Event) -> None:
+        mgr = self.get(session_id)
+        mgr.update(event)
+        self._touched(session_id, mgr)
+
+    def update_many(self, session_id: Hashable, events: Iterable[Event]) -> None:
+        mgr = self.get(session_id)
+        mgr.update_many(events)
+        self._touched(session_id, mgr)
+
+    def render_context(self, session_id: Hashable, **kwargs: Any) -> Dict[str, Any]:
+        mgr = self.get(session_id)
+        snapshot = mgr.render_context(**kwargs)
+        self._touched(session_id, mgr)
+        return snapshot
+
+    def close(self, session_id: Hashable) -> None:
+        """
+        Forget a session entirely (resident copy and any spill file).
+        """
+        if session_id in self._resident:
+            del self._resident[session_id]
+            self._resident_bytes -= self._bytes.pop(session_id, 0)
+        path = self._spilled.pop(session_id, None)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+        self._last_used.pop(session_id, None)
+
+    def evict_idle(self, idle_seconds: float) -> int:
+        """
+        Spill every resident session untouched for idle_seconds. Returns count.
+        """
+        cutoff = self.clock() - idle_seconds
+        idle = [sid for sid in self._resident if self._last_used.get(sid, 0.0) <= cutoff]
+        for sid in idle:
+            self._spill(sid)
+        return len(idle)
+
+    def stats(self) -> Dict[str, Any]:
+        n = len(self._resident)
+        lat = sorted(self._rehydrate_ms)
+        return {
+            "resident_sessions": n,
+            "spilled_sessions": len(self._spilled),
+            "resident_bytes": self._resident_bytes,
+            "bytes_per_session": self._resident_bytes // n if n else 0,
+            "spills": self.spills,
+            "rehydrations": self.rehydrations,
+            "rehydrate_ms": {
+                "mean": round(sum(lat) / len(lat), 3) if lat else 0.0,
+                "p50": round(lat[len(lat) // 2], 3) if lat else 0.0,
+                "max": round(lat[-1], 3) if lat else 0.0,
+            },
+        }
+
+    # -----------------------------
+    # Internal helpers
+    # -----------------------------
+
+    def _touched(self, session_id: Hashable, mgr: ContextWindowManager) -> None:
+        size = mgr.approx_bytes()
+        self._resident_bytes += size - self._bytes.get(session_id, 0)
+        self._bytes[session_id] = size
+        self._enforce_limits(keep=session_id)
+
+    def _enforce_limits(self, keep: Hashable) -> None:
+        while len(self._resident) > 1:
+            over_count = len(self._resident) > self.max_resident
+            over_bytes = self.max_bytes is not None and self._resident_bytes > self.max_bytes
+            if not (over_count or over_bytes):
+                return
+            lru = next(iter(self._resident))
+            if lru == keep:
+                return
+            self._spill(lru)
+
+    def _path(self, session_id: Hashable) -> str:
+        name = hashlib.sha1(repr(session_id).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{name}.pkl")
+
+    def _spill(self, session_id: Hashable) -> None:
+        mgr = self._resident.pop(session_id)
+        self._resident_bytes -= self._bytes.pop(session_id, 0)
+        path = self._path(session_id)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(mgr, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._spilled[session_id] = path
+        self.spills += 1
+
+    def _rehydrate(self, session_id: Hashable) -> ContextWindowManager:
+        t0 = time.perf_counter()
+        path = self._spilled.pop(session_id)
+        with open(path, "rb") as f:
+            mgr: ContextWindowManager = pickle.load(f)
+        os.remove(path)
+        self._rehydrate_ms.append((time.perf_counter() - t0) * 1000.0)
+        self.rehydrations += 1
+
+        self._resident[session_id] = mgr
+        size = mgr.approx_bytes()
+        self._bytes[session_id] = size
+        self._resident_bytes += size
+        self._enforce_limits(keep=session_id)
+        return mgr
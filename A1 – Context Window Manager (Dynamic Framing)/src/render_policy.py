@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class RenderPolicy:
+    """
+    How much the window may hold: per-block top-k and short() widths, how
+    many support frames follow the foreground, and a scale applied to the
+    caller's budget_chars / budget_tokens.
+    """
+    task_k: int = 3
+    task_width: int = 400
+    foreground_k: int = 6
+    foreground_width: int = 500
+    support_k: int = 3
+    support_width: int = 350
+    max_support_frames: int = 5
+    budget_scale: float = 1.0
+
+
+# Keyed by attention budget mode (A2 BudgetMode values). FULL is the fixed
+# layout render_context has always used.
+DEFAULT_RENDER_POLICIES: Dict[str, RenderPolicy] = {
+    "FULL": RenderPolicy(),
+    "CONSERVATIVE": RenderPolicy(
+        task_k=2,
+        task_width=300,
+        foreground_k=4,
+        foreground_width=350,
+        support_k=2,
+        support_width=200,
+        max_support_frames=3,
+        budget_scale=0.7,
+    ),
+    "CRITICAL": RenderPolicy(
+        task_k=1,
+        task_width=200,
+        foreground_k=2,
+        foreground_width=200,
+        support_k=1,
+        support_width=120,
+        max_support_frames=1,
+        budget_scale=0.4,
+    ),
+    "EXHAUSTED": RenderPolicy(
+        task_k=1,
+        task_width=160,
+        foreground_k=1,
+        foreground_width=160,
+        support_k=0,
+        support_width=80,
+        max_support_frames=0,
+        budget_scale=0.25,
+    ),
+}
+
+
+def policy_for_mode(mode: Any, policies: Optional[Mapping[str, RenderPolicy]] = None) -> RenderPolicy:
+    """
+    Policy for a budget mode, given as a BudgetMode-like enum or its value.
+    Unknown modes get the FULL policy.
+    """
+    table = policies if policies is not None else DEFAULT_RENDER_POLICIES
+    key = getattr(mode, "value", mode)
+    return table.get(key) or table.get("FULL") or RenderPolicy()
+
+
+def render_units(tokens: int) -> int:
+    """
+    Default RENDER_CONTEXT charge: one attention unit per started 200 tokens,
+    so a full default window (~2000 chars, ~500 tokens) costs the A2
+    default of 3.
+    """
+    return max(1, -(-tokens // 200))
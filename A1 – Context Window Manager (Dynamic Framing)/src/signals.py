@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.events import EventType
+
+
+class SignalKind(str, Enum):
+    DEADLINE = "DEADLINE"
+    RISK = "RISK"
+    ESCALATION = "ESCALATION"
+
+
+TEXT_SOURCES: Tuple[EventType, ...] = (EventType.OBSERVATION, EventType.MESSAGE, EventType.TOOL_RESULT)
+
+
+@dataclass(frozen=True)
+class SignalRule:
+    """
+    A case-insensitive phrase that raises `kind` when it appears anywhere in
+    the text of an event from one of `sources` (plain substring semantics,
+    same as `phrase in text.lower()`).
+    """
+    name: str
+    phrase: str
+    kind: SignalKind
+    sources: Tuple[EventType, ...] = TEXT_SOURCES
+
+
+class SignalRegistry:
+    """
+    Rule set matched in one pass over the lowercased text.
+
+    Small rule sets use a plain `in` test per phrase. From
+    `compile_threshold` distinct phrases on, phrases are dispatched by their
+    first three characters: the text's set of character trigrams is built
+    once, intersected with the phrases' leading trigrams, and only phrases
+    behind a trigram that occurs in the text get an `in` test. Per-event
+    cost then tracks text length plus actual candidates instead of the rule
+    count.
+
+    Building the trigram set costs about as much as ~150 `in` tests on a
+    short message, so the threshold sits where benchmark.py measured the
+    crossover.
+
+    A frozen registry (see freeze) rejects new rules, so one compiled
+    instance can be shared; DEFAULT_SIGNAL_RULES is shared by every manager
+    built without `signal_rules`.
+    """
+
+    compile_threshold = 200
+
+    def __init__(self, rules: Iterable[SignalRule] = ()) -> None:
+        self._rules: List[SignalRule] = []
+        self._dirty = True
+        # phrase -> rules with exactly that phrase, in rule order
+        self._by_phrase: Dict[str, Tuple[SignalRule, ...]] = {}
+        # dispatch path: leading trigram -> phrases, shorter phrases, phrase order
+        self._by_trigram: Optional[Dict[str, Tuple[str, ...]]] = None
+        self._short: Tuple[str, ...] = ()
+        self._rank: Dict[str, int] = {}
+        self._sources: frozenset = frozenset()
+        self._frozen = False
+        self.extend(rules)
+
+    @staticmethod
+    def default() -> "SignalRegistry":
+        # The original hard-coded observation deadline checks
+        obs = (EventType.OBSERVATION,)
+        return SignalRegistry(
+            [
+                SignalRule("deadline", "deadline", SignalKind.DEADLINE, obs),
+                SignalRule("due", "due", SignalKind.DEADLINE, obs),
+                SignalRule("by", "by ", SignalKind.DEADLINE, obs),
+            ]
+        )
+
+    @property
+    def rules(self) -> List[SignalRule]:
+        return list(self._rules)
+
+    def add(self, rule: SignalRule) -> None:
+        if self._frozen:
+            raise RuntimeError("SignalRegistry is frozen; extend a new SignalRegistry.default() instead")
+        if not rule.phrase:
+            raise ValueError(f"Signal rule {rule.name!r} has an empty phrase")
+        self._rules.append(rule)
+        self._dirty = True
+
+    def extend(self, rules: Iterable[SignalRule]) -> None:
+        for r in rules:
+            self.add(r)
+
+    def freeze(self) -> "SignalRegistry":
+        """
+        Compile now and reject further rules. Returns self.
+        """
+        if self._dirty:
+            self._compile()
+        self._frozen = True
+        return self
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        # Pickled managers (SessionPool spills) keep pointing at the shared default
+        if self is DEFAULT_SIGNAL_RULES:
+            return "DEFAULT_SIGNAL_RULES"
+        return super().__reduce_ex__(protocol)
+
+    def match(self, text: str, source: EventType) -> Dict[SignalKind, List[str]]:
+        """
+        kind -> names of the rules that fired (each rule at most once).
+        """
+        if self._dirty:
+            self._compile()
+        if source not in self._sources or not text:
+            return {}
+        low = text.lower()
+        if self._by_trigram is None:
+            hits = [self._by_phrase[p] for p in self._by_phrase if p in low]
+        else:
+            by_trigram = self._by_trigram
+            found = [p for p in self._short if p in low]
+            for tg in by_trigram.keys() & set(map("".join, zip(low, low[1:], low[2:]))):
+                found.extend(p for p in by_trigram[tg] if len(p) == 3 or p in low)
+            # Same order as the linear path
+            found.sort(key=self._rank.__getitem__)
+            hits = [self._by_phrase[p] for p in found]
+
+        out: Dict[SignalKind, List[str]] = {}
+        for rules in hits:
+            for rule in rules:
+                if source in rule.sources:
+                    names = out.setdefault(rule.kind, [])
+                    if rule.name not in names:
+                        names.append(rule.name)
+        return out
+
+    def _compile(self) -> None:
+        by_phrase: Dict[str, List[SignalRule]] = {}
+        for rule in self._rules:
+            by_phrase.setdefault(rule.phrase.lower(), []).append(rule)
+        self._by_phrase = {p: tuple(rs) for p, rs in by_phrase.items()}
+        self._sources = frozenset(s for r in self._rules for s in r.sources)
+        self._dirty = False
+
+        if len(by_phrase) < self.compile_threshold:
+            self._by_trigram = None
+            return
+
+        by_trigram: Dict[str, List[str]] = {}
+        for p in by_phrase:
+            if len(p) >= 3:
+                by_trigram.setdefault(p[:3], []).append(p)
+        self._by_trigram = {tg: tuple(ps) for tg, ps in by_trigram.items()}
+        self._short = tuple(p for p in by_phrase if len(p) < 3)
+        self._rank = {p: i for i, p in enumerate(by_phrase)}
+
+
+# Compiled once and shared by every manager built without signal_rules
+DEFAULT_SIGNAL_RULES = SignalRegistry.default().freeze()
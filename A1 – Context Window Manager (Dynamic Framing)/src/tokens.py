@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable
+import json
+
+# Any callable text -> token count works (e.g. lambda s: len(enc.encode(s)))
+TokenCounter = Callable[[str], int]
+
+
+def approx_token_count(text: str) -> int:
+    """
+    Dependency-free default: ~4 characters per token, counted per
+    whitespace-separated chunk so line counts add up exactly.
+    """
+    return sum((len(w) + 3) // 4 for w in text.split())
+
+
+class VocabTokenCounter:
+    """
+    Counts tokens against a local BPE vocabulary with greedy longest-match.
+    Close to (not byte-exact with) the model tokenizer, and no dependencies.
+
+    Works per whitespace-separated word, so counts are additive across lines.
+    `word_prefix` is the marker the vocab uses for a leading space (GPT-2
+    style "Ġ"); it is tried first for every word after the first.
+    """
+
+    def __init__(self, vocab: Iterable[str], word_prefix: str = "", cache_size: int = 50_000) -> None:
+        self.vocab = frozenset(t for t in vocab if t)
+        if not self.vocab:
+            raise ValueError("vocab must not be empty")
+        self.word_prefix = word_prefix
+        self.max_len = max(len(t) for t in self.vocab)
+        self.cache_size = cache_size
+        self._cache: Dict[str, int] = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> "VocabTokenCounter":
+        """
+        Load a vocab.json ({token: id} or [token, ...]) or a plain text file
+        with one token per line.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+        try:
+            data = json.loads(raw)
+            tokens = list(data.keys()) if isinstance(data, dict) else [str(t) for t in data]
+        except json.JSONDecodeError:
+            tokens = [line.rstrip("\n") for line in raw.splitlines()]
+        prefix = "Ġ" if any(t.startswith("Ġ") for t in tokens) else ""
+        return cls(tokens, word_prefix=prefix)
+
+    def __call__(self, text: str) -> int:
+        words = text.split()
+        if not words:
+            return 0
+        n = self._word(words[0])
+        for w in words[1:]:
+            n += self._word(self.word_prefix + w)
+        return n
+
+    def _word(self, w: str) -> int:
+        n = self._cache.get(w)
+        if n is not None:
+            return n
+        n, i = 0, 0
+        while i < len(w):
+            j = min(len(w), i + self.max_len)
+            while j > i + 1 and w[i:j] not in self.vocab:
+                j -= 1
+            n += 1  # an unknown single char still costs one token
+            i = j
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[w] = n
+        return n
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+import time
+from typing import Any, List
+
+from src.budget import AttentionBudget
+from src.controller import BudgetController
+from src.cost_model import CostModel, Operation
+from src.shared_budget import SharedBudget
+
+
+def bench_contention(spends_per_thread: int = 20_000) -> None:
+    """
+    Spends/sec through BudgetController.spend as worker threads are added.
+    All workers draw on one tenant -> agent -> episode chain; every run checks
+    that no level was overspent and that the levels agree.
+    """
+    print("\nContention: shared tenant -> agent -> episode budget")
+    print(f"{'threads':>7s} | {'spends/s':>12s} | {'allowed':>8s} | {'overspent':>9s}")
+    cost_model = CostModel.default()
+    cost = cost_model.cost_of(Operation.REASON_STEP)
+    for n_threads in (1, 2, 4, 8, 16):
+        # Sized so roughly half of all spends are refused
+        total = cost * spends_per_thread * n_threads // 2
+        tenant = AttentionBudget(total_units=total * 4)
+        agent = tenant.child(total * 2)
+        episode = agent.child(total)
+        ctrls = [BudgetController(budget=episode, cost_model=cost_model) for _ in range(n_threads)]
+        start = threading.Barrier(n_threads + 1)
+
+        def worker(ctrl: BudgetController) -> None:
+            start.wait()
+            for _ in range(spends_per_thread):
+                ctrl.spend(Operation.REASON_STEP)
+
+        threads: List[threading.Thread] = [threading.Thread(target=worker, args=(c,)) for c in ctrls]
+        for t in threads:
+            t.start()
+        start.wait()
+        t0 = time.perf_counter()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        allowed = sum(c.history.total - c.history.denied for c in ctrls)
+        spent = allowed * cost
+        overspent = spent > total or any(
+            b.total_units - b.remaining_units != spent for b in (episode, agent, tenant)
+        )
+        print(f"{n_threads:>7d} | {n_threads * spends_per_thread / elapsed:>12,.0f} | {allowed:>8d} | {str(overspent):>9s}")
+
+
+def _spend_loop(budget: Any, n: int) -> None:
+    ctrl = BudgetController(budget=budget, cost_model=CostModel.default())
+    for _ in range(n):
+        ctrl.spend(Operation.REASON_STEP)
+
+
+def _spend_worker(budget: SharedBudget, n: int) -> None:
+    _spend_loop(budget, n)
+    budget.close()
+
+
+def bench_shared_budget(spends_per_worker: int = 20_000) -> None:
+    """
+    Spends/sec: in-process AttentionBudget vs SharedBudget (local stand-in and
+    shared memory across worker processes). Every shared run checks that the
+    cross-process counters add up to what left the budget.
+    """
+    print("\nShared budget: in-process vs shared memory")
+    print(f"{'backend':>22s} | {'spends/s':>12s} | {'consistent':>10s}")
+    cost = CostModel.default().cost_of(Operation.REASON_STEP)
+    total = cost * spends_per_worker * 16 // 2
+
+    for label, budget in (("AttentionBudget", AttentionBudget(total_units=total)), ("SharedBudget.local", SharedBudget.local(total))):
+        t0 = time.perf_counter()
+        _spend_loop(budget, spends_per_worker)
+        rate = spends_per_worker / (time.perf_counter() - t0)
+        print(f"{label:>22s} | {rate:>12,.0f} | {'-':>10s}")
+
+    for n_procs in (1, 2, 4, 8):
+        shared = SharedBudget.create(total)
+        try:
+            procs = [
+                multiprocessing.Process(target=_spend_worker, args=(shared, spends_per_worker))
+                for _ in range(n_procs)
+            ]
+            t0 = time.perf_counter()
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+            rate = n_procs * spends_per_worker / (time.perf_counter() - t0)
+
+            counts = shared.op_counts()[Operation.REASON_STEP.value]
+            consistent = (
+                counts["allowed"] + counts["denied"] == n_procs * spends_per_worker
+                and counts["allowed"] * cost == total - shared.remaining_units
+            )
+            print(f"{'shared x' + str(n_procs) + ' procs':>22s} | {rate:>12,.0f} | {str(consistent):>10s}")
+        finally:
+            shared.close()
+            shared.unlink()
+
+
+def bench_simulator(n_episodes: int = 10_000, length: int = 40) -> None:
+    """
+    Policy sweep time: vectorized simulator vs replaying every episode
+    through BudgetController (needs NumPy).
+    """
+    from src.simulator import policy_grid, simulate, synthetic_episodes
+
+    print("\nPolicy sweep: vectorized simulator")
+    episodes = synthetic_episodes(n_episodes, length, min_length=length // 2)
+    configs = policy_grid(
+        full_at=(0.5, 0.6, 0.7, 0.8),
+        conservative_at=(0.15, 0.25, 0.35),
+        total_units=(60, 120, 240),
+    )
+    t0 = time.perf_counter()
+    rows = simulate(episodes, configs)
+    sim_s = time.perf_counter() - t0
+
+    ops = [list(Operation)[c] for c in episodes[0] if c >= 0]
+    t0 = time.perf_counter()
+    for _ in range(200):
+        ctrl = BudgetController(budget=AttentionBudget(total_units=120), cost_model=CostModel.default())
+        for op in ops:
+            ctrl.spend(op)
+    replay_s = (time.perf_counter() - t0) / 200 * n_episodes * len(configs)
+
+    print(f"{len(configs)} configs x {n_episodes:,} episodes: {sim_s:.2f}s (replay estimate {replay_s:.1f}s)")
+    best = max(rows, key=lambda r: (r["completion_rate"], -r["units_used"]))
+    cfg = best["config"]
+    print(
+        f"best completion: full_at={cfg.full_at} conservative_at={cfg.conservative_at} "
+        f"units={cfg.total_units} -> completion {best['completion_rate']:.2f}, "
+        f"early exit {best['early_exit_rate']:.2f}, exhausted {best['exhaustion_rate']:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    print("A2 – Attention Budgeting Engine Benchmarks\n" + "-" * 42)
+    bench_contention()
+    bench_shared_budget()
+    bench_simulator()
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import sys
+import threading
+import time
 
 
 class BudgetMode(str, Enum):
@@ -12,24 +15,74 @@ class BudgetMode(str, Enum):
     EXHAUSTED = "EXHAUSTED"
 
 
+def mode_for(available_units: int, total_units: int) -> BudgetMode:
+    if available_units <= 0:
+        return BudgetMode.EXHAUSTED
+    r = available_units / total_units
+    if r >= 0.60:
+        return BudgetMode.FULL
+    if r >= 0.25:
+        return BudgetMode.CONSERVATIVE
+    return BudgetMode.CRITICAL
+
+
+# Default remaining_units: start full (anything above total_units is clamped)
+_FULL = sys.maxsize
+
+
 @dataclass
 class AttentionBudget:
     """
     Tracks a finite attention budget for an episode.
     Units are abstract "cognitive cost units".
+
+    Budgets can be nested (tenant -> agent -> episode) through `parent`: a
+    spend debits this budget and every ancestor, and is refused if any level
+    cannot cover it. A whole tree shares one re-entrant lock, so try_spend()
+    is an atomic check-and-debit across all levels and safe to call from
+    many threads.
+
+    `reserved_units` are held for a plan but not spent yet: they are not
+    available to other spends and already count towards `mode`.
     """
     total_units: int
-    remaining_units: Optional[int] = None
+    remaining_units: int = _FULL
+    parent: Optional["AttentionBudget"] = field(default=None, repr=False, compare=False)
+    lock: threading.RLock = field(init=False, repr=False, compare=False)
+    reserved_units: int = field(default=0, init=False)
 
     def __post_init__(self) -> None:
         if self.total_units <= 0:
             raise ValueError("total_units must be > 0")
-        if self.remaining_units is None:
-            self.remaining_units = self.total_units
         if self.remaining_units < 0:
             self.remaining_units = 0
         if self.remaining_units > self.total_units:
             self.remaining_units = self.total_units
+        self.lock = self.parent.lock if self.parent is not None else threading.RLock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks cannot be pickled; __setstate__ gives the restored tree a new one
+        state = self.__dict__.copy()
+        state.pop("lock", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # The parent is restored first, so a tree pickled together shares one lock
+        self.lock = self.parent.lock if self.parent is not None else threading.RLock()
+
+    def child(self, total_units: int) -> "AttentionBudget":
+        """
+        A nested budget (e.g. an agent under a tenant) drawing on this one.
+        """
+        return AttentionBudget(total_units=total_units, parent=self)
+
+    def chain(self) -> Iterator["AttentionBudget"]:
+        # This budget first, then each ancestor up to the root
+        b: Optional[AttentionBudget] = self
+        while b is not None:
+            yield b
+            b = b.parent
 
     @property
     def depletion_ratio(self) -> float:
@@ -41,25 +94,136 @@ class AttentionBudget:
     def remaining_ratio(self) -> float:
         return self.remaining_units / self.total_units
 
+    @property
+    def available_units(self) -> int:
+        # Remaining minus what is reserved
+        return self.remaining_units - self.reserved_units
+
     @property
     def mode(self) -> BudgetMode:
-        if self.remaining_units <= 0:
-            return BudgetMode.EXHAUSTED
-        r = self.remaining_ratio
-        if r >= 0.60:
-            return BudgetMode.FULL
-        if r >= 0.25:
-            return BudgetMode.CONSERVATIVE
-        return BudgetMode.CRITICAL
+        return mode_for(self.available_units, self.total_units)
 
     def can_spend(self, cost: int) -> bool:
         if cost < 0:
             raise ValueError("cost must be >= 0")
-        return self.remaining_units >= cost
+        with self.lock:
+            return all(b.available_units >= cost for b in self.chain())
 
     def spend(self, cost: int) -> None:
         if cost < 0:
             raise ValueError("cost must be >= 0")
-        self.remaining_units -= cost
-        if self.remaining_units < 0:
-            self.remaining_units = 0
+        with self.lock:
+            for b in self.chain():
+                b.remaining_units -= cost
+                if b.remaining_units < 0:
+                    b.remaining_units = 0
+
+    def try_spend(self, cost: int) -> bool:
+        """
+        Atomic can_spend + spend: debits every level, or none if any level
+        would go negative.
+        """
+        if cost < 0:
+            raise ValueError("cost must be >= 0")
+        with self.lock:
+            levels: List[AttentionBudget] = list(self.chain())
+            for b in levels:
+                if b.available_units < cost:
+                    return False
+            for b in levels:
+                b.remaining_units -= cost
+            return True
+
+    def try_reserve(self, units: int) -> bool:
+        """
+        Atomically hold `units` at every level, or at none.
+        """
+        if units < 0:
+            raise ValueError("units must be >= 0")
+        with self.lock:
+            levels: List[AttentionBudget] = list(self.chain())
+            for b in levels:
+                if b.available_units < units:
+                    return False
+            for b in levels:
+                b.reserved_units += units
+            return True
+
+    def release(self, units: int) -> None:
+        """
+        Give back units held by try_reserve (at every level).
+        """
+        if units < 0:
+            raise ValueError("units must be >= 0")
+        with self.lock:
+            for b in self.chain():
+                b.reserved_units = max(0, b.reserved_units - units)
+
+
+@dataclass
+class RefillingBudget(AttentionBudget):
+    """
+    Token-bucket variant for long-lived agents: a sustained-throughput limit
+    instead of a one-shot episode pool.
+
+    `total_units` is the burst capacity; the level refills at
+    `refill_per_sec` units per second of `clock` (monotonic, injectable for
+    tests) up to that capacity. Every read of the level refills it first, so
+    `mode` reflects the current level and degrades/recovers smoothly.
+    """
+    refill_per_sec: float = 0.0
+    clock: Callable[[], float] = field(default=time.monotonic, repr=False, compare=False)
+    _last: float = field(default=0.0, init=False, repr=False, compare=False)
+    _carry: float = field(default=0.0, init=False, repr=False, compare=False)  # fractional unit
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        if self.refill_per_sec < 0:
+            raise ValueError("refill_per_sec must be >= 0")
+        self._last = self.clock()
+
+    def refill(self) -> None:
+        with self.lock:
+            now = self.clock()
+            elapsed, self._last = now - self._last, now
+            if self.remaining_units >= self.total_units:
+                self._carry = 0.0  # a full bucket does not bank refill
+                return
+            if elapsed <= 0:
+                return
+            gained = self._carry + elapsed * self.refill_per_sec
+            whole = int(gained + 1e-9)  # absorb float drift (0.5 + 0.5 -> 0.999...)
+            self._carry = max(0.0, gained - whole)
+            self.remaining_units = min(self.total_units, self.remaining_units + whole)
+
+    def time_until(self, cost: int) -> float:
+        """
+        Seconds until `cost` can be spent here (0.0 if it can now; inf if it
+        never can: above burst capacity, or no refill).
+        """
+        with self.lock:
+            deficit = cost - self.available_units
+            if deficit <= 0:
+                return 0.0
+            if cost > self.total_units - self.reserved_units or self.refill_per_sec <= 0:
+                return float("inf")
+            return max(0.0, (deficit - self._carry) / self.refill_per_sec)
+
+    @property
+    def available_units(self) -> int:
+        self.refill()
+        return self.remaining_units - self.reserved_units
+
+    @property
+    def remaining_ratio(self) -> float:
+        self.refill()
+        return self.remaining_units / self.total_units
+
+    @property
+    def depletion_ratio(self) -> float:
+        self.refill()
+        return (self.total_units - self.remaining_units) / self.total_units
+
+    def spend(self, cost: int) -> None:
+        self.refill()
+        super().spend(cost)
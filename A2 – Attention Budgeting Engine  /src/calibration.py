@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+import bisect
+import threading
+import time
+
+from src.cost_model import CostModel, Operation
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: counts[i] holds samples <= bounds[i]; the last
+    bucket takes everything above the largest bound.
+    """
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts: List[int] = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        # Upper bound of the bucket holding the q-th sample (inf past the last)
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.bounds[i] if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+
+# 0.25 ms .. ~65 s, and 1 .. ~65k tokens, doubling per bucket
+LATENCY_BOUNDS_MS: Tuple[float, ...] = tuple(0.25 * 2 ** i for i in range(19))
+TOKEN_BOUNDS: Tuple[float, ...] = tuple(float(2 ** i) for i in range(17))
+
+
+class Measurement:
+    """
+    Handle yielded by CostCalibrator.measure(); set `tokens` inside the block
+    to record how many tokens the operation consumed.
+    """
+
+    def __init__(self, op: Operation) -> None:
+        self.op = op
+        self.tokens: Optional[int] = None
+        self.latency_ms = 0.0
+
+
+class CostCalibrator:
+    """
+    Learns per-operation costs from measurements.
+
+    Wrap the code that performs each Operation with `measure(op)` (or
+    decorate it with `timed(op)`). Every sample goes into a latency and a
+    token histogram and updates an EWMA of the chosen unit:
+    - unit="ms": cost = EWMA latency in milliseconds * scale
+    - unit="tokens": cost = EWMA tokens * scale (samples without tokens are
+      not used for the EWMA)
+
+    model() returns a frozen CostModel: `base` with every measured op
+    overridden (through with_override) by its rounded EWMA cost. Size the
+    AttentionBudget in the same unit so it reflects real capacity.
+    """
+
+    def __init__(
+        self,
+        base: Optional[CostModel] = None,
+        unit: str = "ms",
+        alpha: float = 0.2,
+        scale: float = 1.0,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        if unit not in ("ms", "tokens"):
+            raise ValueError("unit must be 'ms' or 'tokens'")
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self.base = base or CostModel.default()
+        self.unit = unit
+        self.alpha = alpha
+        self.scale = scale
+        self.clock = clock
+
+        self.latency: Dict[Operation, Histogram] = {}
+        self.tokens: Dict[Operation, Histogram] = {}
+        self.ewma: Dict[Operation, float] = {}
+        self._lock = threading.Lock()
+        self._model: Optional[CostModel] = None
+
+    # -----------------------------
+    # Timing hooks
+    # -----------------------------
+
+    @contextmanager
+    def measure(self, op: Operation) -> Iterator[Measurement]:
+        m = Measurement(op)
+        t0 = self.clock()
+        try:
+            yield m
+        finally:
+            m.latency_ms = (self.clock() - t0) * 1000.0
+            self.record(op, m.latency_ms, m.tokens)
+
+    def timed(self, op: Operation) -> Callable[[F], F]:
+        """
+        Decorator form of measure(); records latency only.
+        """
+        def deco(fn: F) -> F:
+            @wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.measure(op):
+                    return fn(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return deco
+
+    def record(self, op: Operation, latency_ms: float, tokens: Optional[int] = None) -> None:
+        with self._lock:
+            self.latency.setdefault(op, Histogram(LATENCY_BOUNDS_MS)).add(latency_ms)
+            if tokens is not None:
+                self.tokens.setdefault(op, Histogram(TOKEN_BOUNDS)).add(float(tokens))
+
+            sample = latency_ms if self.unit == "ms" else tokens
+            if sample is None:
+                return
+            prev = self.ewma.get(op)
+            self.ewma[op] = float(sample) if prev is None else prev + self.alpha * (sample - prev)
+            self._model = None
+
+    # -----------------------------
+    # Calibrated model
+    # -----------------------------
+
+    def model(self) -> CostModel:
+        """
+        Current calibrated CostModel (cached until the next sample).
+        """
+        with self._lock:
+            if self._model is None:
+                model = self.base
+                for op, value in self.ewma.items():
+                    model = model.with_override(op, max(0, round(value * self.scale)))
+                self._model = model
+            return self._model
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {}
+            for op, h in self.latency.items():
+                tok = self.tokens.get(op)
+                out[op.value] = {
+                    "samples": h.count,
+                    "latency_ms_mean": round(h.mean, 3),
+                    "latency_ms_p50": h.quantile(0.5),
+                    "latency_ms_p95": h.quantile(0.95),
+                    "tokens_mean": round(tok.mean, 1) if tok else None,
+                    "ewma": round(self.ewma[op], 3) if op in self.ewma else None,
+                }
+            return out
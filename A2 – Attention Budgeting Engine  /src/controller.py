@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 from src.budget import AttentionBudget, BudgetMode
 from src.cost_model import CostModel, Operation
+from src.history import SpendHistory, SpendResult
 
 
 @dataclass
-class SpendResult:
-    op: Operation
+class BatchSpendResult:
+    """
+    Outcome of spending a whole plan at once (all ops or none).
+    """
+    ops: Tuple[Operation, ...]
     cost: int
     remaining: int
     mode: BudgetMode
@@ -17,36 +21,164 @@ class SpendResult:
     meta: Dict[str, Any]
 
 
+@dataclass
+class Hold:
+    """
+    Units reserved for a plan by BudgetController.reserve(). Commit it with
+    the ops actually run, or release it; either closes the hold.
+    """
+    ops: Tuple[Operation, ...]
+    units: int
+    granted: bool
+    active: bool
+
+
 class BudgetController:
     """
     Applies a CostModel to an AttentionBudget and exposes budget-aware policy knobs.
     Standalone by design; later A1/A3/A10 can query these policy knobs.
+
+    Thread-safe: several controllers (one per worker) may share a budget, or
+    hold child budgets of a common parent.
     """
 
-    def __init__(self, budget: AttentionBudget, cost_model: CostModel) -> None:
+    def __init__(
+        self,
+        budget: AttentionBudget,
+        cost_model: CostModel,
+        history: Optional[SpendHistory] = None,
+    ) -> None:
         self.budget = budget
         self.cost_model = cost_model
-        self.history: list[SpendResult] = []
+        # Bounded ring of recent spends + O(1) aggregates over all of them
+        self.history = history if history is not None else SpendHistory()
+        # Budgets that keep their own per-op counters (e.g. SharedBudget)
+        self._count_op = getattr(budget, "count_op", None)
 
-    def spend(self, op: Operation, meta: Optional[Dict[str, Any]] = None) -> SpendResult:
+    def spend(self, op: Operation, meta: Optional[Dict[str, Any]] = None, cost: Optional[int] = None) -> SpendResult:
+        """
+        `cost` overrides the cost model, for ops metered by actual size (e.g.
+        A1 charging RENDER_CONTEXT by the tokens it rendered). `op` may also
+        be given by value ("RENDER_CONTEXT").
+        """
+        op = Operation(op)
         meta = dict(meta or {})
-        cost = self.cost_model.cost_of(op)
+        if cost is None:
+            cost = self.cost_model.cost_of(op)
+        elif cost < 0:
+            raise ValueError("cost must be >= 0")
 
-        allowed = self.budget.can_spend(cost)
-        if allowed:
-            self.budget.spend(cost)
+        budget = self.budget
+        with budget.lock:
+            # Check, debit and snapshot in one step: worker threads sharing
+            # this budget (or an ancestor of it) cannot overspend between them
+            allowed = budget.try_spend(cost)
+            remaining = budget.remaining_units
+            mode = budget.mode
+            if self._count_op is not None:
+                self._count_op(op, allowed)
+            self.history.append(op, cost, remaining, mode, allowed, meta)
 
         result = SpendResult(
             op=op,
             cost=cost,
-            remaining=self.budget.remaining_units,  # type: ignore[arg-type]
-            mode=self.budget.mode,
+            remaining=remaining,
+            mode=mode,
             allowed=allowed,
             meta=meta,
         )
-        self.history.append(result)
         return result
 
+    def spend_many(self, ops: Iterable[Operation], meta: Optional[Dict[str, Any]] = None) -> BatchSpendResult:
+        """
+        Spend a plan in one atomic step: every op is paid for, or none is.
+        Each op is still recorded in history.
+        """
+        ops = tuple(ops)
+        meta = dict(meta or {})
+        costs = self._costs(ops)
+        budget = self.budget
+        with budget.lock:
+            allowed = budget.try_spend(sum(costs))
+            return self._record_batch(ops, costs, allowed, meta)
+
+    def reserve(self, ops: Iterable[Operation]) -> Hold:
+        """
+        Hold the cost of a plan up front. If `hold.granted` is False the plan
+        does not fit and nothing was reserved. Held units are unavailable to
+        other spends and already lower `mode` (and so the policy knobs).
+        """
+        ops = tuple(ops)
+        units = sum(self._costs(ops))
+        granted = self.budget.try_reserve(units)
+        return Hold(ops=ops, units=units, granted=granted, active=granted)
+
+    def commit(
+        self,
+        hold: Hold,
+        ops: Optional[Iterable[Operation]] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> BatchSpendResult:
+        """
+        Spend the ops actually run (default: the reserved ones) against the
+        hold and close it. Cost beyond the hold is drawn from available
+        units; if that is not possible nothing is spent and the hold stays
+        open.
+        """
+        self._check_active(hold)
+        ops = hold.ops if ops is None else tuple(ops)
+        meta = dict(meta or {})
+        costs = self._costs(ops)
+        budget = self.budget
+        with budget.lock:
+            budget.release(hold.units)
+            allowed = budget.try_spend(sum(costs))
+            if allowed:
+                hold.active = False
+            else:
+                budget.try_reserve(hold.units)  # just released under the same lock
+            return self._record_batch(ops, costs, allowed, meta)
+
+    def release(self, hold: Hold) -> None:
+        self._check_active(hold)
+        self.budget.release(hold.units)
+        hold.active = False
+
+    # -----------------------------
+    # Internal helpers
+    # -----------------------------
+
+    def _costs(self, ops: Tuple[Operation, ...]) -> Tuple[int, ...]:
+        # One cost_of lookup per distinct op
+        table = {op: self.cost_model.cost_of(op) for op in set(ops)}
+        return tuple(table[op] for op in ops)
+
+    def _record_batch(
+        self,
+        ops: Tuple[Operation, ...],
+        costs: Tuple[int, ...],
+        allowed: bool,
+        meta: Dict[str, Any],
+    ) -> BatchSpendResult:
+        # Caller holds the budget lock. Per-op history rows show remaining as
+        # it was after each op of the batch was paid for.
+        budget = self.budget
+        remaining: int = budget.remaining_units
+        mode = budget.mode
+        after = remaining + sum(costs) if allowed else remaining
+        for op, cost in zip(ops, costs):
+            if allowed:
+                after -= cost
+            if self._count_op is not None:
+                self._count_op(op, allowed)
+            self.history.append(op, cost, after, mode, allowed, meta)
+        return BatchSpendResult(ops=ops, cost=sum(costs), remaining=remaining, mode=mode, allowed=allowed, meta=meta)
+
+    @staticmethod
+    def _check_active(hold: Hold) -> None:
+        if not hold.active:
+            raise ValueError("hold is not active (not granted, or already committed/released)")
+
     # -----------------------------
     # Budget-aware policy controls
     # -----------------------------
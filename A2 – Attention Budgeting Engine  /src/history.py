@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple
+import json
+import struct
+
+from src.budget import BudgetMode
+from src.cost_model import Operation
+
+_OPS: Tuple[Operation, ...] = tuple(Operation)
+_OP_CODE: Dict[Operation, int] = {op: i for i, op in enumerate(_OPS)}
+_MODES: Tuple[BudgetMode, ...] = tuple(BudgetMode)
+_MODE_CODE: Dict[BudgetMode, int] = {m: i for i, m in enumerate(_MODES)}
+
+# Binary export record: op code, mode code, allowed, cost, remaining
+_RECORD = struct.Struct("<BBBqq")
+
+
+@dataclass
+class SpendResult:
+    op: Operation
+    cost: int
+    remaining: int
+    mode: BudgetMode
+    allowed: bool
+    meta: Dict[str, Any]
+
+
+class SpendHistory:
+    """
+    Bounded, column-per-field ring buffer of spend records.
+
+    Keeps the last `capacity` spends in typed arrays (op code, cost,
+    remaining, mode, allowed) plus an optional meta dict per slot. Running
+    aggregates cover every spend ever recorded and are read in O(1).
+
+    With `export_path` set, each record is appended to that file when the
+    ring overwrites it (`export_format` "jsonl", or "binary" for fixed-size
+    `_RECORD` structs without meta), so the full audit trail survives without
+    growing memory. close() also exports what is still in the ring.
+    """
+
+    def __init__(self, capacity: int = 4096, export_path: Optional[str] = None, export_format: str = "jsonl") -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        if export_format not in ("jsonl", "binary"):
+            raise ValueError("export_format must be 'jsonl' or 'binary'")
+        self.capacity = capacity
+        self.export_path = export_path
+        self.export_format = export_format
+        # Export file: one of the two, depending on export_format
+        self._text_sink: Optional[TextIO] = None
+        self._bin_sink: Optional[BinaryIO] = None
+
+        self._op = array("B", bytes(capacity))
+        self._mode = array("B", bytes(capacity))
+        self._allowed = array("B", bytes(capacity))
+        self._cost = array("q", bytes(8 * capacity))
+        self._remaining = array("q", bytes(8 * capacity))
+        self._meta: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._next = 0  # total records ever appended; slot = _next % capacity
+        self._export_from = 0  # first record index not yet exported
+
+        # Running aggregates over every record, evicted ones included
+        self.op_counts: Dict[Operation, int] = {op: 0 for op in _OPS}
+        self.total_cost = 0
+        self.denied = 0
+        self.mode_transitions: Dict[Tuple[BudgetMode, BudgetMode], int] = {}
+        self._last_mode: Optional[BudgetMode] = None
+        self.exported = 0
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+
+    def append(
+        self,
+        op: Operation,
+        cost: int,
+        remaining: int,
+        mode: BudgetMode,
+        allowed: bool,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        i = self._next % self.capacity
+        if self.export_path is not None and self._next - self.capacity >= self._export_from:
+            self._export(i)
+            self._export_from += 1
+        self._op[i] = _OP_CODE[op]
+        self._mode[i] = _MODE_CODE[mode]
+        self._allowed[i] = allowed
+        self._cost[i] = cost
+        self._remaining[i] = remaining
+        self._meta[i] = meta or None  # not copied: the controller hands over its own copy
+        self._next += 1
+
+        self.op_counts[op] += 1
+        if allowed:
+            self.total_cost += cost
+        else:
+            self.denied += 1
+        last = self._last_mode
+        if last is not None and last != mode:
+            key = (last, mode)
+            self.mode_transitions[key] = self.mode_transitions.get(key, 0) + 1
+        self._last_mode = mode
+
+    # -----------------------------
+    # Reading
+    # -----------------------------
+
+    @property
+    def total(self) -> int:
+        # Every record ever appended (retained + evicted)
+        return self._next
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    def __getitem__(self, index: int) -> SpendResult:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("history index out of range")
+        return self._record((self._next - n + index) % self.capacity)
+
+    def __iter__(self) -> Iterator[SpendResult]:
+        # Oldest retained record first
+        n = len(self)
+        for k in range(self._next - n, self._next):
+            yield self._record(k % self.capacity)
+
+    def aggregates(self) -> Dict[str, Any]:
+        return {
+            "spends": self._next,
+            "retained": len(self),
+            "exported": self.exported,
+            "total_cost": self.total_cost,
+            "denied": self.denied,
+            "op_counts": {op.value: n for op, n in self.op_counts.items()},
+            "mode_transitions": {f"{a.value}->{b.value}": n for (a, b), n in self.mode_transitions.items()},
+        }
+
+    # -----------------------------
+    # Export
+    # -----------------------------
+
+    def close(self) -> None:
+        """
+        Export the records still in the ring (if exporting) and close the file.
+        """
+        if self.export_path is not None:
+            for k in range(max(self._export_from, self._next - len(self)), self._next):
+                self._export(k % self.capacity)
+            self._export_from = self._next
+        if self._text_sink is not None:
+            self._text_sink.close()
+            self._text_sink = None
+        if self._bin_sink is not None:
+            self._bin_sink.close()
+            self._bin_sink = None
+
+    @staticmethod
+    def read_export(path: str, export_format: str = "jsonl") -> Iterator[Dict[str, Any]]:
+        """
+        Stream records back from an export file, oldest first.
+        """
+        if export_format == "jsonl":
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+            return
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(_RECORD.size)
+                if len(chunk) < _RECORD.size:
+                    return
+                op, mode, allowed, cost, remaining = _RECORD.unpack(chunk)
+                yield {
+                    "op": _OPS[op].value,
+                    "cost": cost,
+                    "remaining": remaining,
+                    "mode": _MODES[mode].value,
+                    "allowed": bool(allowed),
+                    "meta": {},
+                }
+
+    def _record(self, i: int) -> SpendResult:
+        return SpendResult(
+            op=_OPS[self._op[i]],
+            cost=self._cost[i],
+            remaining=self._remaining[i],
+            mode=_MODES[self._mode[i]],
+            allowed=bool(self._allowed[i]),
+            meta=self._meta[i] or {},
+        )
+
+    def _export(self, i: int) -> None:
+        assert self.export_path is not None
+        if self.export_format == "jsonl":
+            if self._text_sink is None:
+                self._text_sink = open(self.export_path, "a", encoding="utf-8")
+            rec = {
+                "op": _OPS[self._op[i]].value,
+                "cost": self._cost[i],
+                "remaining": self._remaining[i],
+                "mode": _MODES[self._mode[i]].value,
+                "allowed": bool(self._allowed[i]),
+                "meta": self._meta[i] or {},
+            }
+            self._text_sink.write(json.dumps(rec, default=str) + "\n")
+        else:
+            if self._bin_sink is None:
+                self._bin_sink = open(self.export_path, "ab")
+            self._bin_sink.write(
+                _RECORD.pack(self._op[i], self._mode[i], self._allowed[i], self._cost[i], self._remaining[i])
+            )
+        self.exported += 1
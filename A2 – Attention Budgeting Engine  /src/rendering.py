@@ -29,4 +29,4 @@ def print_summary(budget: AttentionBudget, ctrl: BudgetController) -> None:
     print(f"- max_reason_steps: {ctrl.max_reason_steps()}")
     print(f"- should_exit_early:{ctrl.should_exit_early()}")
     print("-" * 80)
-    print(f"Events logged: {len(ctrl.history)}")
+    print(f"Events logged: {ctrl.history.total}")
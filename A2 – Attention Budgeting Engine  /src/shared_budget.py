@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, Optional, Tuple
+import multiprocessing
+import threading
+
+from src.budget import BudgetMode, mode_for
+from src.cost_model import Operation
+
+_OPS: Tuple[Operation, ...] = tuple(Operation)
+_OP_INDEX: Dict[Operation, int] = {op: i for i, op in enumerate(_OPS)}
+
+# int64 slots: total, remaining, reserved, then allowed and denied counts per op
+_TOTAL, _REMAINING, _RESERVED, _COUNTS = 0, 1, 2, 3
+_SLOTS = _COUNTS + 2 * len(_OPS)
+
+
+class SharedBudget:
+    """
+    AttentionBudget backend shared by a pool of worker processes.
+
+    `remaining_units`, `reserved_units` and per-op spend counters live in one
+    multiprocessing.shared_memory block; every update happens under a
+    process-shared re-entrant lock, so try_spend() is an atomic
+    check-and-debit across processes. Pass it to BudgetController as the
+    budget, in each worker.
+
+    - SharedBudget.create(total_units): new block (the creator should unlink()
+      it when the pool is done)
+    - pass the instance to workers as a Process/Pool initializer argument (the
+      lock can only be shared when the process is started)
+    - SharedBudget.local(total_units): same interface over a plain buffer and
+      a threading lock, for single-process tests
+
+    No parent hierarchy: a shared budget is always the root.
+    """
+
+    parent = None
+
+    def __init__(self, buf: Any, lock: Any, shm: Optional[shared_memory.SharedMemory] = None) -> None:
+        self._shm = shm
+        self._cells = memoryview(buf).cast("q")
+        self.lock = lock
+
+    @staticmethod
+    def create(total_units: int, name: Optional[str] = None, ctx: Any = None) -> "SharedBudget":
+        """
+        `ctx`: the multiprocessing context the workers are started with
+        (default: the global one), so the lock matches their start method.
+        """
+        if total_units <= 0:
+            raise ValueError("total_units must be > 0")
+        shm = shared_memory.SharedMemory(name=name, create=True, size=8 * _SLOTS)
+        budget = SharedBudget(shm.buf, (ctx or multiprocessing).RLock(), shm)
+        budget._init(total_units)
+        return budget
+
+    @staticmethod
+    def local(total_units: int) -> "SharedBudget":
+        if total_units <= 0:
+            raise ValueError("total_units must be > 0")
+        budget = SharedBudget(bytearray(8 * _SLOTS), threading.RLock())
+        budget._init(total_units)
+        return budget
+
+    @property
+    def name(self) -> Optional[str]:
+        return self._shm.name if self._shm is not None else None
+
+    def close(self) -> None:
+        """
+        Detach this process from the block (call in every process).
+        """
+        if self._shm is not None:
+            self._cells.release()
+            self._shm.close()
+
+    def unlink(self) -> None:
+        """
+        Destroy the block (creator only, once all workers are done).
+        """
+        if self._shm is not None:
+            self._shm.unlink()
+
+    def __reduce__(self) -> Any:
+        if self._shm is None:
+            raise TypeError("SharedBudget.local() cannot be sent to another process")
+        return (_attach, (self._shm.name, self.lock))
+
+    # -----------------------------
+    # AttentionBudget interface
+    # -----------------------------
+
+    @property
+    def total_units(self) -> int:
+        return self._cells[_TOTAL]
+
+    @property
+    def remaining_units(self) -> int:
+        return self._cells[_REMAINING]
+
+    @property
+    def reserved_units(self) -> int:
+        return self._cells[_RESERVED]
+
+    @property
+    def available_units(self) -> int:
+        c = self._cells
+        return c[_REMAINING] - c[_RESERVED]
+
+    @property
+    def depletion_ratio(self) -> float:
+        return (self.total_units - self.remaining_units) / self.total_units
+
+    @property
+    def remaining_ratio(self) -> float:
+        return self.remaining_units / self.total_units
+
+    @property
+    def mode(self) -> BudgetMode:
+        return mode_for(self.available_units, self.total_units)
+
+    def chain(self) -> Iterator["SharedBudget"]:
+        yield self
+
+    def can_spend(self, cost: int) -> bool:
+        if cost < 0:
+            raise ValueError("cost must be >= 0")
+        return self.available_units >= cost
+
+    def spend(self, cost: int) -> None:
+        if cost < 0:
+            raise ValueError("cost must be >= 0")
+        with self.lock:
+            c = self._cells
+            c[_REMAINING] = max(0, c[_REMAINING] - cost)
+
+    def try_spend(self, cost: int) -> bool:
+        if cost < 0:
+            raise ValueError("cost must be >= 0")
+        with self.lock:
+            c = self._cells
+            if c[_REMAINING] - c[_RESERVED] < cost:
+                return False
+            c[_REMAINING] -= cost
+            return True
+
+    def try_reserve(self, units: int) -> bool:
+        if units < 0:
+            raise ValueError("units must be >= 0")
+        with self.lock:
+            c = self._cells
+            if c[_REMAINING] - c[_RESERVED] < units:
+                return False
+            c[_RESERVED] += units
+            return True
+
+    def release(self, units: int) -> None:
+        if units < 0:
+            raise ValueError("units must be >= 0")
+        with self.lock:
+            c = self._cells
+            c[_RESERVED] = max(0, c[_RESERVED] - units)
+
+    # -----------------------------
+    # Shared per-op counters
+    # -----------------------------
+
+    def count_op(self, op: Operation, allowed: bool) -> None:
+        # Called by BudgetController under self.lock
+        i = _COUNTS + _OP_INDEX[op] + (0 if allowed else len(_OPS))
+        self._cells[i] += 1
+
+    def op_counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Spends per op across every process: {"TOOL_CALL": {"allowed": n, "denied": m}, ...}
+        """
+        with self.lock:
+            c = self._cells
+            return {
+                op.value: {"allowed": c[_COUNTS + i], "denied": c[_COUNTS + len(_OPS) + i]}
+                for i, op in enumerate(_OPS)
+            }
+
+    def _init(self, total_units: int) -> None:
+        c = self._cells
+        for i in range(_SLOTS):
+            c[i] = 0
+        c[_TOTAL] = total_units
+        c[_REMAINING] = total_units
+
+
+def _attach(name: str, lock: Any) -> SharedBudget:
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        # Python < 3.13: workers share the creator's resource tracker, so the
+        # duplicate registration is harmless
+        shm = shared_memory.SharedMemory(name=name)
+    return SharedBudget(shm.buf, lock, shm)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.budget import BudgetMode
+from src.cost_model import CostModel, Operation
+
+_OPS: Tuple[Operation, ...] = tuple(Operation)
+_OP_INDEX: Dict[Operation, int] = {op: i for i, op in enumerate(_OPS)}
+_MODE_INDEX: Dict[BudgetMode, int] = {m: i for i, m in enumerate(BudgetMode)}
+_FULL = _MODE_INDEX[BudgetMode.FULL]
+_CONSERVATIVE = _MODE_INDEX[BudgetMode.CONSERVATIVE]
+_CRITICAL = _MODE_INDEX[BudgetMode.CRITICAL]
+_EXHAUSTED = _MODE_INDEX[BudgetMode.EXHAUSTED]
+
+PAD = -1  # op code for "episode already over" in padded sequences
+
+
+@dataclass(frozen=True)
+class PolicyConfig:
+    """
+    One point of the sweep. Tables are indexed by mode:
+    (FULL, CONSERVATIVE, CRITICAL, EXHAUSTED), like BudgetController's knobs.
+    """
+    full_at: float = 0.60          # remaining ratio for FULL
+    conservative_at: float = 0.25  # remaining ratio for CONSERVATIVE
+    memory_k: Tuple[int, int, int, int] = (8, 4, 2, 0)
+    reason_steps: Tuple[int, int, int, int] = (6, 3, 1, 0)
+    cost_model: CostModel = field(default_factory=CostModel.default)
+    total_units: int = 60
+    exit_early: bool = True
+
+
+def policy_grid(
+    full_at: Iterable[float] = (0.60,),
+    conservative_at: Iterable[float] = (0.25,),
+    cost_models: Iterable[CostModel] = (),
+    total_units: Iterable[int] = (60,),
+    **fixed: Any,
+) -> List[PolicyConfig]:
+    """
+    Cartesian product of the given values (configs with conservative_at >=
+    full_at are skipped). Other PolicyConfig fields can be fixed by keyword.
+    """
+    models = list(cost_models) or [CostModel.default()]
+    return [
+        PolicyConfig(full_at=f, conservative_at=c, cost_model=m, total_units=u, **fixed)
+        for f, c, m, u in product(full_at, conservative_at, models, total_units)
+        if c < f
+    ]
+
+
+def encode_episodes(episodes: Sequence[Sequence[Operation]]) -> np.ndarray:
+    """
+    Recorded op sequences -> (n_episodes, max_len) int8 op codes, PAD-filled.
+    """
+    width = max((len(ep) for ep in episodes), default=0)
+    out = np.full((len(episodes), width), PAD, dtype=np.int8)
+    for i, ep in enumerate(episodes):
+        out[i, : len(ep)] = [_OP_INDEX[op] for op in ep]
+    return out
+
+
+def synthetic_episodes(
+    n: int,
+    length: int,
+    probs: Optional[Dict[Operation, float]] = None,
+    min_length: Optional[int] = None,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    n random episodes of i.i.d. ops (uniform unless `probs` is given), with
+    lengths uniform in [min_length, length].
+    """
+    rng = np.random.default_rng(seed)
+    p = np.array([(probs or {}).get(op, 0.0 if probs else 1.0) for op in _OPS], dtype=np.float64)
+    ops = rng.choice(len(_OPS), size=(n, length), p=p / p.sum()).astype(np.int8)
+    if min_length is not None and min_length < length:
+        lengths = rng.integers(min_length, length + 1, size=n)
+        ops[np.arange(length)[None, :] >= lengths[:, None]] = PAD
+    return ops
+
+
+def simulate(episodes: np.ndarray, configs: Sequence[PolicyConfig]) -> List[Dict[str, Any]]:
+    """
+    Run every episode under every config (needs NumPy). All (config,
+    episode) pairs advance together as lanes of one array, one op per
+    iteration. The simulated agent, per op:
+    - exits early when `exit_early` and the mode is CRITICAL or worse
+    - skips TOOL_CALL when tools are not allowed (CRITICAL/EXHAUSTED), a
+      MEMORY_RETRIEVAL when memory_k is 0, and REASON_STEPs past
+      reason_steps[mode] in a run of consecutive reasoning steps
+    - otherwise spends the op's cost; a spend the budget cannot cover ends
+      the episode as exhausted
+
+    Returns one row per config: exhaustion / early-exit / completion rates
+    and per-episode means of ops run, ops skipped, memories retrieved,
+    reasoning steps and units used.
+    """
+    ops = np.asarray(episodes, dtype=np.int64)
+    n_cfg, (n_ep, n_steps) = len(configs), ops.shape
+    shape = (n_cfg, n_ep)
+
+    cost = np.array([[c.cost_model.cost_of(op) for op in _OPS] for c in configs], dtype=np.int64)
+    total = np.array([c.total_units for c in configs], dtype=np.int64)[:, None]
+    full_at = np.array([c.full_at for c in configs])[:, None]
+    cons_at = np.array([c.conservative_at for c in configs])[:, None]
+    mem_k = np.array([c.memory_k for c in configs], dtype=np.int64)
+    reason_cap = np.array([c.reason_steps for c in configs], dtype=np.int64)
+    exit_early = np.array([c.exit_early for c in configs])[:, None]
+    cfg_idx = np.arange(n_cfg)[:, None]
+
+    remaining = np.broadcast_to(total, shape).copy()
+    active = np.ones(shape, dtype=bool)
+    exhausted = np.zeros(shape, dtype=bool)
+    exited = np.zeros(shape, dtype=bool)
+    ops_run = np.zeros(shape, dtype=np.int64)
+    ops_skipped = np.zeros(shape, dtype=np.int64)
+    memories = np.zeros(shape, dtype=np.int64)
+    reasoning = np.zeros(shape, dtype=np.int64)
+    burst = np.zeros(n_ep, dtype=np.int64)
+
+    tool, mem, reason = (_OP_INDEX[o] for o in (Operation.TOOL_CALL, Operation.MEMORY_RETRIEVAL, Operation.REASON_STEP))
+    for t in range(n_steps):
+        op = ops[:, t]
+        valid = (op != PAD)[None, :] & active
+        if not valid.any():
+            break
+        is_reason = op == reason
+        burst = np.where(is_reason, burst + 1, 0)
+
+        ratio = remaining / total
+        mode = np.where(
+            remaining <= 0,
+            _EXHAUSTED,
+            np.where(ratio >= full_at, _FULL, np.where(ratio >= cons_at, _CONSERVATIVE, _CRITICAL)),
+        )
+        leave = valid & exit_early & (mode >= _CRITICAL)
+        exited |= leave
+        active &= ~leave
+        valid &= ~leave
+
+        k = mem_k[cfg_idx, mode]
+        skip = (
+            ((op == tool)[None, :] & (mode >= _CRITICAL))
+            | ((op == mem)[None, :] & (k == 0))
+            | (is_reason[None, :] & (burst[None, :] > reason_cap[cfg_idx, mode]))
+        )
+        ops_skipped += valid & skip
+        run = valid & ~skip
+
+        c = cost[:, np.maximum(op, 0)]
+        ok = run & (remaining >= c)
+        denied = run & ~ok
+        exhausted |= denied
+        active &= ~denied
+
+        remaining -= np.where(ok, c, 0)
+        ops_run += ok
+        memories += np.where(ok & (op == mem)[None, :], k, 0)
+        reasoning += ok & is_reason[None, :]
+
+    completed = active
+    used = total - remaining
+    rows: List[Dict[str, Any]] = []
+    for i, cfg in enumerate(configs):
+        rows.append(
+            {
+                "config": cfg,
+                "exhaustion_rate": float(exhausted[i].mean()),
+                "early_exit_rate": float(exited[i].mean()),
+                "completion_rate": float(completed[i].mean()),
+                "ops_run": float(ops_run[i].mean()),
+                "ops_skipped": float(ops_skipped[i].mean()),
+                "memories": float(memories[i].mean()),
+                "reason_steps": float(reasoning[i].mean()),
+                "units_used": float(used[i].mean()),
+            }
+        )
+    return rows
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Iterator, List
+
+from src.budget_adapter import BudgetMode
+from src.disk_store import DiskMemoryStore
+from src.embedding import VectorIndex
+from src.gate import MemoryGate, ScoredMemory
+from src.memory import MemoryItem, MemoryStore
+from src.retrieval import SalienceIndex
+from src.salience import SalienceConfig, SalienceScorer
+
+_WORDS = (
+    "budget memory tool risk privacy goal task deadline repo architecture agent salience "
+    "context frame vector recall user prefers modular build integrate plan step cost"
+).split()
+
+
+def _items(rnd: random.Random, n: int) -> List[MemoryItem]:
+    tags = ("goal", "task", "risk", "privacy", "misc", "tools", "repo")
+    return [
+        MemoryItem(
+            " ".join(rnd.choices(_WORDS, k=8)),
+            tags=tuple(rnd.sample(tags, 2)),
+            base_relevance=rnd.random(),
+            age_steps=rnd.randint(0, 60),
+            risk=rnd.random(),
+        )
+        for _ in range(n)
+    ]
+
+
+def _scalar_select(scorer: SalienceScorer, items: List[MemoryItem], query: str, frame: str, k: int) -> List[ScoredMemory]:
+    # The original one-score()-per-candidate path
+    scored = [ScoredMemory(item=c, score=scorer.score(c, task_query=query, foreground_frame=frame)) for c in items]
+    scored.sort(key=lambda x: x.score, reverse=True)
+    return scored[:k]
+
+
+def bench_select(sizes=(1_000, 100_000, 1_000_000), scalar_limit: int = 100_000) -> None:
+    """
+    MemoryGate.select latency (batched NumPy scoring + argpartition) next to
+    the scalar per-item path, asserting that both pick the same items.
+    """
+    print("\nMemoryGate.select: batched vs scalar scoring (k=8)")
+    print(f"{'items':>10s} | {'batched ms':>11s} | {'scalar ms':>10s} | {'same top-k':>10s}")
+    rnd = random.Random(0)
+    scorer = SalienceScorer(SalienceConfig())
+    gate = MemoryGate(scorer)
+    query = "integrate memory budget with the agent build plan"
+    for n in sizes:
+        items = _items(rnd, n)
+        t0 = time.perf_counter()
+        got = gate.select(items, task_query=query, foreground_frame="TASK", budget_mode=BudgetMode.FULL)
+        batched_ms = (time.perf_counter() - t0) * 1000
+
+        if n <= scalar_limit:
+            t0 = time.perf_counter()
+            ref = _scalar_select(scorer, items, query, "TASK", 8)
+            scalar = f"{(time.perf_counter() - t0) * 1000:>10.1f}"
+            same = str([id(s.item) for s in got] == [id(s.item) for s in ref])
+        else:
+            scalar, same = f"{'-':>10s}", "-"
+        print(f"{n:>10,d} | {batched_ms:>11.1f} | {scalar} | {same:>10s}")
+        assert same != "False", f"batched select differs from scalar at {n:,d} items"
+
+
+def bench_store_select(sizes=(100_000, 1_000_000)) -> None:
+    """
+    select(store.all()) (re-tokenizes every memory per query) next to
+    select_from_store (pre-tokenized, indexed), on a narrow query; both must
+    return the same top-k.
+    """
+    print("\nMemoryStore: select(all) vs select_from_store (k=8)")
+    print(f"{'items':>10s} | {'index s':>8s} | {'select ms':>10s} | {'store ms':>9s} | {'static':>9s} | {'same':>5s}")
+    rnd = random.Random(1)
+    gate = MemoryGate(SalienceScorer(SalienceConfig()))
+    query = "deadline for the privacy plan"
+    for n in sizes:
+        items = _items(rnd, n)
+        t0 = time.perf_counter()
+        store = MemoryStore()
+        for it in items:
+            store.add(it)
+        index_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ref = gate.select(store.all(), task_query=query, foreground_frame="RISK", budget_mode=BudgetMode.FULL)
+        select_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        got = gate.select_from_store(store, task_query=query, foreground_frame="RISK", budget_mode=BudgetMode.FULL)
+        store_ms = (time.perf_counter() - t0) * 1000
+        same = str([id(s.item) for s in got] == [id(s.item) for s in ref])
+        print(f"{n:>10,d} | {index_s:>8.1f} | {select_ms:>10.1f} | {store_ms:>9.1f} | {gate.last_static_only:>9,d} | {same:>5s}")
+        assert same == "True", f"select_from_store differs from select at {n:,d} items"
+
+
+def bench_disk_store(n: int = 1_000_000) -> None:
+    """
+    DiskMemoryStore: write throughput, cold open, and select_from_store over
+    the memory-mapped columns next to the in-memory MemoryStore.
+    """
+    print(f"\nDiskMemoryStore ({n:,d} memories, k=8)")
+    rnd = random.Random(2)
+    items = _items(rnd, n)
+    gate = MemoryGate(SalienceScorer(SalienceConfig()))
+    query = "deadline for the privacy plan"
+    path = tempfile.mkdtemp(prefix="a3_store_")
+    try:
+        t0 = time.perf_counter()
+        store = DiskMemoryStore(path)
+        store.add_many(items)
+        store.close()
+        print(f"  write + flush: {time.perf_counter() - t0:.1f} s")
+
+        t0 = time.perf_counter()
+        store = DiskMemoryStore(path, readonly=True)
+        print(f"  cold open:     {(time.perf_counter() - t0) * 1000:.2f} ms")
+        for label in ("first select", "warm select"):
+            t0 = time.perf_counter()
+            got = gate.select_from_store(store, task_query=query, foreground_frame="RISK", budget_mode=BudgetMode.FULL)
+            print(f"  {label + ':':<14s} {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+        mem = MemoryStore()
+        for it in items:
+            mem.add(it)
+        t0 = time.perf_counter()
+        ref = gate.select_from_store(mem, task_query=query, foreground_frame="RISK", budget_mode=BudgetMode.FULL)
+        print(f"  in-memory:     {(time.perf_counter() - t0) * 1000:.1f} ms")
+        same = [s.item for s in got] == [s.item for s in ref]
+        print(f"  same top-k:    {same}")
+        assert same, "disk select_from_store differs from in-memory"
+    finally:
+        shutil.rmtree(path)
+
+
+def _stream(n: int, seed: int) -> Iterator[MemoryItem]:
+    # Candidates produced one at a time, like rows from a cursor
+    rnd = random.Random(seed)
+    for _ in range(n):
+        yield _items(rnd, 1)[0]
+
+
+def bench_stream(sizes=(10_000, 100_000)) -> None:
+    """
+    select_stream over a generator: latency and peak traced memory, which
+    should not grow with the number of candidates, and a check against
+    select over the same candidates as a list.
+    """
+    print("\nMemoryGate.select_stream over a generator (k=8)")
+    print(f"{'items':>10s} | {'ms':>9s} | {'peak KiB':>9s} | {'same':>5s}")
+    gate = MemoryGate(SalienceScorer(SalienceConfig()))
+    query = "integrate memory budget"
+    for n in sizes:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        got = gate.select_stream(_stream(n, 3), task_query=query, foreground_frame="TASK", budget_mode=BudgetMode.FULL)
+        ms = (time.perf_counter() - t0) * 1000
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        ref = gate.select(list(_stream(n, 3)), task_query=query, foreground_frame="TASK", budget_mode=BudgetMode.FULL)
+        same = [s.item for s in got] == [s.item for s in ref]
+        print(f"{n:>10,d} | {ms:>9.1f} | {peak / 1024:>9.1f} | {str(same):>5s}")
+        assert same, f"select_stream differs from select at {n:,d} items"
+
+
+def bench_index_search(sizes=(10_000, 100_000, 1_000_000)) -> None:
+    """
+    SalienceIndex.search (upper-bound pruning) next to select_stream, which
+    scores every memory; "+100 ms" adds 100 memories to the built index and
+    searches again, and that result must match select_stream.
+    """
+    print("\nSalienceIndex.search vs select_stream (k=8)")
+    print(
+        f"{'items':>10s} | {'build ms':>9s} | {'search ms':>10s} | {'+100 ms':>8s} | {'stream ms':>10s} | "
+        f"{'scored':>8s} | {'pruned':>10s} | {'same':>5s}"
+    )
+    rnd = random.Random(4)
+    scorer = SalienceScorer(SalienceConfig())
+    gate = MemoryGate(scorer)
+    query = "integrate memory budget with the agent build plan"
+    for n in sizes:
+        items = _items(rnd, n)
+        t0 = time.perf_counter()
+        index = SalienceIndex(scorer, items)
+        index.search("", "TASK", BudgetMode.FULL)  # sort once
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        got = index.search(query, "TASK", BudgetMode.FULL)
+        search_ms = (time.perf_counter() - t0) * 1000
+        extra = _items(rnd, 100)
+        t0 = time.perf_counter()
+        for it in extra:
+            index.add(it)
+        got = index.search(query, "TASK", BudgetMode.FULL)
+        add_ms = (time.perf_counter() - t0) * 1000
+        items += extra
+        t0 = time.perf_counter()
+        ref = gate.select_stream(items, query, "TASK", BudgetMode.FULL)
+        stream_ms = (time.perf_counter() - t0) * 1000
+        same = str([id(s.item) for s in got] == [id(s.item) for s in ref])
+        print(
+            f"{n:>10,d} | {build_ms:>9.1f} | {search_ms:>10.2f} | {add_ms:>8.1f} | {stream_ms:>10.1f} | "
+            f"{index.last_scored:>8,d} | {index.last_pruned:>10,d} | {same:>5s}"
+        )
+        assert same == "True", f"SalienceIndex.search differs from select_stream at {n:,d} items"
+
+
+def bench_clock(n: int = 1_000_000, ticks: int = 10) -> None:
+    """
+    Aging a store by one step: rewriting every item's age_steps next to
+    MemoryStore.tick(), plus a select_from_store after the ticks.
+    """
+    print(f"\nAging {n:,d} memories by one step")
+    rnd = random.Random(5)
+    items = _items(rnd, n)
+    store = MemoryStore()
+    for it in items:
+        store.add(it)
+
+    t0 = time.perf_counter()
+    for it in items:
+        it.age_steps += 1
+    print(f"  rewrite age_steps: {(time.perf_counter() - t0) * 1000:>10.2f} ms / step")
+
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        store.tick()
+    print(f"  store.tick():      {(time.perf_counter() - t0) * 1e6 / ticks:>10.2f} us / step")
+
+    gate = MemoryGate(SalienceScorer(SalienceConfig()))
+    t0 = time.perf_counter()
+    gate.select_from_store(store, task_query="deadline for the privacy plan", foreground_frame="RISK", budget_mode=BudgetMode.FULL)
+    print(f"  select after {ticks} ticks: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+def _topic_texts(rnd: random.Random, n: int, n_topics: int = 200, per_topic: int = 40) -> List[str]:
+    # Each text mostly draws from one topic's words, so neighbours are meaningful
+    return [
+        " ".join([f"t{t}w{rnd.randrange(per_topic)}" for _ in range(8)] + [f"t{rnd.randrange(n_topics)}w{rnd.randrange(per_topic)}" for _ in range(2)])
+        for t in (rnd.randrange(n_topics) for _ in range(n))
+    ]
+
+
+def bench_vector_index(n: int = 100_000, n_queries: int = 50, top_n: int = 10, probes=(1, 4, 16, 64)) -> None:
+    """
+    VectorIndex: embedding throughput, exact brute-force latency, and IVF
+    recall@top_n / latency for several n_probe values.
+    """
+    print(f"\nVectorIndex ({n:,d} texts, dim=128, recall@{top_n} over {n_queries} queries)")
+    rnd = random.Random(6)
+    texts = _topic_texts(rnd, n)
+    queries = [" ".join(f"t{t}w{rnd.randrange(40)}" for _ in range(3)) for t in (rnd.randrange(200) for _ in range(n_queries))]
+
+    index = VectorIndex(dim=128)
+    t0 = time.perf_counter()
+    for text in texts:
+        index.add(text)
+    print(f"  embed + add:  {(time.perf_counter() - t0) * 1e6 / n:.1f} us / text")
+
+    t0 = time.perf_counter()
+    truth = [{i for i, _ in index.search(q, top_n, exact=True)} for q in queries]
+    print(f"  exact search: {(time.perf_counter() - t0) * 1000 / n_queries:.2f} ms / query")
+
+    t0 = time.perf_counter()
+    index.build_ivf()
+    print(f"  build_ivf:    {time.perf_counter() - t0:.1f} s ({index.n_lists} lists)")
+    print(f"  {'n_probe':>8s} | {'recall':>7s} | {'ms/query':>9s}")
+    for n_probe in probes:
+        index.n_probe = n_probe
+        t0 = time.perf_counter()
+        hits = sum(len(truth[j] & {i for i, _ in index.search(q, top_n)}) for j, q in enumerate(queries))
+        ms = (time.perf_counter() - t0) * 1000 / n_queries
+        print(f"  {n_probe:>8d} | {hits / (top_n * n_queries):>7.3f} | {ms:>9.2f}")
+
+    store = MemoryStore(vectors=VectorIndex(dim=128))
+    for text in texts:
+        store.add(MemoryItem(text, age_steps=rnd.randint(0, 60), risk=rnd.random()))
+    gate = MemoryGate(SalienceScorer(SalienceConfig()))
+    t0 = time.perf_counter()
+    for q in queries:
+        gate.select_from_store(store, task_query=q, foreground_frame="TASK", budget_mode=BudgetMode.FULL, use_vectors=True)
+    print(f"  select_from_store with embedding base: {(time.perf_counter() - t0) * 1000 / n_queries:.1f} ms / query")
+
+
+if __name__ == "__main__":
+    print("A3 – Salience-Driven Memory Access Benchmarks\n" + "-" * 45)
+    bench_select()
+    bench_store_select()
+    bench_disk_store()
+    bench_stream()
+    bench_index_search()
+    bench_clock()
+    bench_vector_index()
@@ -0,0 +1,558 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple
+import fcntl
+import json
+import os
+
+import numpy as np
+
+from src.memory import MemoryItem
+from src.text import tokenize
+
+# column file -> dtype. *_off columns hold n + 1 offsets (leading 0).
+_COLUMNS: Dict[str, Any] = {
+    "base": np.float64,
+    "written": np.float64,
+    "risk": np.float64,
+    "n_tokens": np.int64,
+    "text_off": np.int64,
+    "tok_off": np.int64,
+    "tok_ids": np.int32,
+    "tag_off": np.int64,
+    "tag_ids": np.int32,
+}
+_OFFSETS = ("text_off", "tok_off", "tag_off")
+# Layout version recorded in meta.json; other versions are refused on open
+_VERSION = 2
+_META = "meta.json"
+_BLOB = "text.blob"
+_VOCAB = "vocab.jsonl"
+_LOG = "append.log"
+_LOCK = "writer.lock"
+_POSTINGS = "postings"
+# posting kinds: token -> item IDs, tag -> item IDs
+_KINDS = ("tok", "tag")
+_EMPTY_IDS = np.zeros(0, dtype=np.int64)
+
+
+class _Segment:
+    """
+    CSR postings of one flush (or a merge of several): sorted keys, n + 1
+    offsets, and item IDs grouped by key, ascending within a key.
+    """
+
+    def __init__(self, keys: np.ndarray, off: np.ndarray, ids: np.ndarray) -> None:
+        self.keys = keys
+        self.off = off
+        self.ids = ids
+
+    def lookup(self, key: int) -> np.ndarray:
+        i = int(np.searchsorted(self.keys, key))
+        if i == len(self.keys) or self.keys[i] != key:
+            return _EMPTY_IDS
+        return self.ids[self.off[i] : self.off[i + 1]]
+
+    def pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        return np.repeat(self.keys, np.diff(self.off)), np.asarray(self.ids)
+
+
+class DiskMemoryStore:
+    """
+    Persistent MemoryStore for stores that do not fit in RAM as MemoryItems.
+
+    Layout of the store directory:
+    - one raw file per column (base, written_at, risk, distinct token
+      count), read through memory-mapped NumPy arrays
+    - text in an append-only blob, indexed by an offsets column
+    - token IDs and tag IDs per memory as offsets + flat ID columns; IDs
+      index vocab.jsonl (one JSON string per line)
+    - postings/: per-flush CSR segments (token -> item IDs, tag -> item
+      IDs), so a posting lookup is a binary search per segment plus a slice
+    - meta.json: layout version, committed item count, file sizes, posting
+      segments and the clock (`now`)
+
+    add() writes the memory to append.log; flush() appends pending memories
+    to the columns, then commits meta.json and clears the log. Only committed
+    memories are visible to readers. Opening a store maps the columns without
+    reading them.
+
+    Each flush writes one posting segment. Segments are merged lazily when
+    a flush leaves one at least half the size of the segment before it, so
+    there are O(log n) of them and each posting is rewritten O(log n) times.
+
+    One writer per directory: a writer holds an exclusive flock on
+    writer.lock until close(). Only the lock holder cuts uncommitted tails,
+    replays a log left by a crashed writer and deletes unreferenced
+    segments; a second writer fails to open.
+    `readonly=True` opens a reader instead: it never takes the lock or
+    touches a file, maps only the committed lengths, and calls refresh() to
+    see new commits.
+
+    Exposes the same read interface as MemoryStore (columns, postings,
+    tag_postings, query_tokens, get), so MemoryGate.select_from_store scans
+    it directly.
+    """
+
+    def __init__(self, path: str, flush_every: int = 4096, readonly: bool = False) -> None:
+        self.path = path
+        self.flush_every = flush_every
+        self.readonly = readonly
+        self._lock: Optional[IO[bytes]] = None
+        if not readonly:
+            os.makedirs(path, exist_ok=True)
+            self._lock = self._acquire_lock()
+            if not os.path.exists(self._file(_META)):
+                self._create()
+        self._meta, self._segments = self._open_committed()
+        self.now: float = self._meta["now"]
+        self._maps: Dict[str, np.ndarray] = {}
+        self._vocab: Optional[Dict[str, int]] = None
+        self._words: Optional[List[str]] = None
+        self._pending: List[MemoryItem] = []
+        self._log: Any = None
+        if not readonly:
+            self._recover()
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+
+    def add(self, item: MemoryItem) -> int:
+        """
+        Log the item; returns the ID it will have once flushed. An item
+        without written_at is stored as a copy stamped with the current clock.
+        """
+        self._check_writable()
+        if self._log is None:
+            self._log = open(self._file(_LOG), "a", encoding="utf-8")
+        item_id = self._meta["count"] + len(self._pending)
+        if item.written_at is None:
+            item = replace(item, written_at=self.now - item.age_steps)
+        self._log.write(json.dumps(_record(item_id, item)) + "\n")
+        self._pending.append(item)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        return item_id
+
+    def add_many(self, items: Iterable[MemoryItem]) -> None:
+        for it in items:
+            self.add(it)
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Append pending memories to the column files and commit them.
+        """
+        self._check_writable()
+        if self._log is not None:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        if not self._pending:
+            if self.now != self._meta["now"]:
+                self._write_meta(dict(self._meta, now=self.now))
+            return
+        vocab = self._load_vocab()
+        meta = self._meta
+        n_words = len(self._words or [])
+
+        cols: Dict[str, List[Any]] = {name: [] for name in _COLUMNS}
+        tag_keys: List[int] = []
+        tag_items: List[int] = []
+        blob: List[bytes] = []
+        text_end = meta["blob_bytes"]
+        tok_end = self._last("tok_off")
+        tag_end = self._last("tag_off")
+        for item_id, it in enumerate(self._pending, meta["count"]):
+            ids = {self._token_id(t) for t in tokenize(it.text)}
+            ids.update(self._token_id(t) for t in it.tags)
+            tag_ids = [self._token_id(t) for t in it.tags]
+            data = it.text.encode("utf-8")
+            blob.append(data)
+            text_end += len(data)
+            tok_end += len(ids)
+            tag_end += len(tag_ids)
+            cols["base"].append(it.base_relevance)
+            cols["written"].append(it.written_at)
+            cols["risk"].append(it.risk)
+            cols["n_tokens"].append(len(ids))
+            cols["text_off"].append(text_end)
+            cols["tok_off"].append(tok_end)
+            cols["tok_ids"].extend(sorted(ids))
+            cols["tag_off"].append(tag_end)
+            cols["tag_ids"].extend(tag_ids)
+            for tid in set(tag_ids):
+                tag_keys.append(tid)
+                tag_items.append(item_id)
+
+        with open(self._file(_BLOB), "ab") as f:
+            f.write(b"".join(blob))
+            os.fsync(f.fileno())
+        with open(self._file(_VOCAB), "ab") as f:
+            for w in (self._words or [])[n_words:]:
+                f.write(json.dumps(w).encode("utf-8") + b"\n")
+            os.fsync(f.fileno())
+            vocab_bytes = f.tell()
+        for name, dtype in _COLUMNS.items():
+            with open(self._file(name), "ab") as f:
+                f.write(np.asarray(cols[name], dtype=dtype).tobytes())
+                os.fsync(f.fileno())
+
+        item_ids = np.arange(meta["count"], meta["count"] + len(self._pending), dtype=np.int64)
+        batch = {
+            "tok": (np.asarray(cols["tok_ids"], dtype=np.int32), np.repeat(item_ids, cols["n_tokens"])),
+            "tag": (np.asarray(tag_keys, dtype=np.int32), np.asarray(tag_items, dtype=np.int64)),
+        }
+        segments, next_seg, dropped = self._add_segment(batch, len(self._pending))
+
+        self._write_meta(
+            {
+                "version": _VERSION,
+                "count": meta["count"] + len(self._pending),
+                "blob_bytes": text_end,
+                "vocab_bytes": vocab_bytes,
+                "vocab_count": len(vocab),
+                "now": self.now,
+                "segments": segments,
+                "next_seg": next_seg,
+            }
+        )
+        for seq in dropped:
+            self._remove_segment(seq)
+        self._segments = self._map_segments(self._meta)
+        self._pending = []
+        self._maps = {}
+        if self._log is not None:
+            self._log.truncate(0)
+            self._log.seek(0)
+
+    def tick(self, steps: float = 1) -> float:
+        """
+        Advance the clock (persisted with the next commit). Returns the new now.
+        """
+        self._check_writable()
+        self.now += steps
+        return self.now
+
+    def close(self) -> None:
+        if not self.readonly and self._lock is not None:
+            self.flush()
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            fcntl.flock(self._lock, fcntl.LOCK_UN)
+            self._lock.close()
+            self._lock = None
+        self._maps = {}
+
+    def refresh(self) -> None:
+        """
+        Reader side: pick up memories committed since open / last refresh.
+        """
+        self._meta, self._segments = self._open_committed()
+        self.now = self._meta["now"]
+        self._maps = {}
+        self._vocab = self._words = None
+
+    # -----------------------------
+    # Zero-copy column views
+    # -----------------------------
+
+    def __len__(self) -> int:
+        return self._meta["count"]
+
+    @property
+    def base(self) -> np.ndarray:
+        return self._column("base")
+
+    @property
+    def written(self) -> np.ndarray:
+        return self._column("written")
+
+    @property
+    def risk(self) -> np.ndarray:
+        return self._column("risk")
+
+    @property
+    def n_tokens(self) -> np.ndarray:
+        return self._column("n_tokens")
+
+    # -----------------------------
+    # MemoryStore read interface
+    # -----------------------------
+
+    def get(self, item_id: int) -> MemoryItem:
+        if not 0 <= item_id < len(self):
+            raise IndexError(item_id)
+        text_off, tag_off = self._column("text_off"), self._column("tag_off")
+        blob = self._column(_BLOB)
+        words = self._load_words()
+        return MemoryItem(
+            text=blob[text_off[item_id] : text_off[item_id + 1]].tobytes().decode("utf-8"),
+            tags=tuple(words[i] for i in self._column("tag_ids")[tag_off[item_id] : tag_off[item_id + 1]]),
+            base_relevance=float(self.base[item_id]),
+            age_steps=int(self.now - self.written[item_id]),
+            risk=float(self.risk[item_id]),
+            written_at=float(self.written[item_id]),
+        )
+
+    def all(self) -> List[MemoryItem]:
+        # Materializes every memory; prefer the column views for scans
+        return [self.get(i) for i in range(len(self))]
+
+    def query_tokens(self, text: str) -> Tuple[List[int], int]:
+        vocab = self._load_vocab()
+        toks = set(tokenize(text))
+        return [vocab[t] for t in toks if t in vocab], len(toks)
+
+    def postings(self, token_id: int) -> np.ndarray:
+        return self._items_with("tok", token_id)
+
+    def tag_postings(self, tag: str) -> np.ndarray:
+        tid = self._load_vocab().get(tag)
+        if tid is None:
+            return _EMPTY_IDS
+        return self._items_with("tag", tid)
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+
+    def _items_with(self, kind: str, key: int) -> np.ndarray:
+        # Segments cover ascending ID ranges, so the concatenation is sorted
+        parts = [seg.lookup(key) for seg in self._segments[kind]]
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return _EMPTY_IDS
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _add_segment(
+        self, batch: Dict[str, Tuple[np.ndarray, np.ndarray]], n_items: int
+    ) -> Tuple[List[List[int]], int, List[int]]:
+        # Write the flush's segment, then merge while the newest segment is at
+        # least half the size of the one before it. Returns the new segment
+        # list, the next sequence number and the sequences merged away.
+        segments = [list(s) for s in self._meta["segments"]]
+        next_seg = self._meta["next_seg"]
+        for kind in _KINDS:
+            self._write_segment(kind, next_seg, *_csr(*batch[kind]))
+        segments.append([next_seg, n_items])
+        next_seg += 1
+        dropped: List[int] = []
+        while len(segments) >= 2 and segments[-2][1] <= 2 * segments[-1][1]:
+            (old, n_old), (new, n_new) = segments[-2], segments[-1]
+            for kind in _KINDS:
+                keys_a, ids_a = self._load_segment(kind, old).pairs()
+                keys_b, ids_b = self._load_segment(kind, new).pairs()
+                self._write_segment(
+                    kind, next_seg, *_csr(np.concatenate([keys_a, keys_b]), np.concatenate([ids_a, ids_b]))
+                )
+            segments[-2:] = [[next_seg, n_old + n_new]]
+            dropped += [old, new]
+            next_seg += 1
+        return segments, next_seg, dropped
+
+    def _open_committed(self) -> Tuple[Dict[str, Any], Dict[str, List[_Segment]]]:
+        # A writer may merge segments away between reading meta.json and
+        # mapping them; re-read meta.json and map again in that case
+        for attempt in range(3):
+            meta = self._read_meta()
+            try:
+                return meta, self._map_segments(meta)
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+        raise AssertionError("unreachable")
+
+    def _map_segments(self, meta: Dict[str, Any]) -> Dict[str, List[_Segment]]:
+        return {kind: [self._load_segment(kind, seq) for seq, _ in meta["segments"]] for kind in _KINDS}
+
+    def _load_segment(self, kind: str, seq: int) -> _Segment:
+        keys, off, ids = (
+            _map_file(self._segment_file(kind, seq, part), dtype)
+            for part, dtype in (("keys", np.int32), ("off", np.int64), ("ids", np.int64))
+        )
+        return _Segment(keys, off, ids)
+
+    def _write_segment(self, kind: str, seq: int, keys: np.ndarray, off: np.ndarray, ids: np.ndarray) -> None:
+        for part, data in (("keys", keys), ("off", off), ("ids", ids)):
+            with open(self._segment_file(kind, seq, part), "wb") as f:
+                f.write(data.tobytes())
+                os.fsync(f.fileno())
+
+    def _remove_segment(self, seq: int) -> None:
+        for kind in _KINDS:
+            for part in ("keys", "off", "ids"):
+                try:
+                    os.remove(self._segment_file(kind, seq, part))
+                except FileNotFoundError:
+                    pass
+
+    def _segment_file(self, kind: str, seq: int, part: str) -> str:
+        return os.path.join(self.path, _POSTINGS, f"{kind}.{seq}.{part}")
+
+    def _column(self, name: str) -> np.ndarray:
+        view = self._maps.get(name)
+        if view is None:
+            view = self._maps[name] = self._map(name)
+        return view
+
+    def _map(self, name: str) -> np.ndarray:
+        n = self._meta["count"]
+        if name == _BLOB:
+            dtype, length = np.uint8, self._meta["blob_bytes"]
+        else:
+            dtype = _COLUMNS[name]
+            length = n + 1 if name in _OFFSETS else n
+            if name in ("tok_ids", "tag_ids"):
+                length = int(self._column(name.replace("_ids", "_off"))[n])
+        if length == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode="r", shape=(length,))
+
+    def _last(self, off: str) -> int:
+        return int(self._column(off)[self._meta["count"]])
+
+    def _token_id(self, token: str) -> int:
+        vocab = self._load_vocab()
+        tid = vocab.get(token)
+        if tid is None:
+            tid = vocab[token] = len(self._words or [])
+            self._words.append(token)  # type: ignore[union-attr]
+        return tid
+
+    def _load_vocab(self) -> Dict[str, int]:
+        if self._vocab is None:
+            self._vocab = {w: i for i, w in enumerate(self._load_words())}
+        return self._vocab
+
+    def _load_words(self) -> List[str]:
+        if self._words is None:
+            with open(self._file(_VOCAB), "rb") as f:
+                data = f.read(self._meta["vocab_bytes"])
+            self._words = [json.loads(line) for line in data.splitlines()]
+        return self._words
+
+    def _check_writable(self) -> None:
+        if self.readonly:
+            raise ValueError(f"{self.path}: store opened read-only")
+        if self._lock is None:
+            raise ValueError(f"{self.path}: store is closed")
+
+    def _acquire_lock(self) -> IO[bytes]:
+        f = open(self._file(_LOCK), "ab")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            raise RuntimeError(f"{self.path}: store is open by another writer") from None
+        return f
+
+    def _recover(self) -> None:
+        # Writer only, under the lock: cut files back to the committed sizes,
+        # then replay the append log
+        meta, n = self._meta, self._meta["count"]
+        for name, dtype in _COLUMNS.items():
+            size = (n + 1 if name in _OFFSETS else n) * np.dtype(dtype).itemsize
+            if name in ("tok_ids", "tag_ids"):
+                size = self._last(name.replace("_ids", "_off")) * np.dtype(dtype).itemsize
+            self._truncate(name, size)
+        self._truncate(_BLOB, meta["blob_bytes"])
+        self._truncate(_VOCAB, meta["vocab_bytes"])
+        # Segments written or merged away by a flush that did not finish
+        live = {seq for seq, _ in meta["segments"]}
+        for name in os.listdir(os.path.join(self.path, _POSTINGS)):
+            if int(name.split(".")[1]) not in live:
+                os.remove(os.path.join(self.path, _POSTINGS, name))
+
+        log = self._file(_LOG)
+        if os.path.exists(log) and os.path.getsize(log):
+            with open(log, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.endswith("\n")]
+            # Records below `count` were committed before the log was cleared
+            self._pending = [
+                MemoryItem(r["text"], tuple(r["tags"]), r["base_relevance"], r["age_steps"], r["risk"], r["written_at"])
+                for r in records
+                if r["id"] >= n
+            ]
+            self._log = open(log, "a", encoding="utf-8")
+            self.flush()
+
+    def _truncate(self, name: str, size: int) -> None:
+        p = self._file(name)
+        if os.path.getsize(p) > size:
+            with open(p, "r+b") as f:
+                f.truncate(size)
+
+    def _create(self) -> None:
+        # A store without meta.json is only created in an empty directory:
+        # never truncate the data files of a store whose meta.json was lost
+        files = list(_COLUMNS) + [_BLOB, _VOCAB, _LOG, _POSTINGS]
+        if any(os.path.exists(self._file(name)) for name in files):
+            raise RuntimeError(f"{self.path}: {_META} is missing but store files exist; not recreating the store")
+        os.makedirs(self._file(_POSTINGS))
+        for name in list(_COLUMNS) + [_BLOB, _VOCAB]:
+            with open(self._file(name), "xb") as f:
+                if name in _OFFSETS:
+                    f.write(np.zeros(1, dtype=np.int64).tobytes())
+        self._write_meta(
+            {
+                "version": _VERSION,
+                "count": 0,
+                "blob_bytes": 0,
+                "vocab_bytes": 0,
+                "vocab_count": 0,
+                "now": 0,
+                "segments": [],
+                "next_seg": 0,
+            }
+        )
+
+    def _read_meta(self) -> Dict[str, Any]:
+        with open(self._file(_META), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != _VERSION:
+            raise RuntimeError(f"{self.path}: unsupported store version {meta.get('version')!r} (expected {_VERSION})")
+        return meta
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        tmp = self._file(_META + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file(_META))
+        self._meta = meta
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+
+def _csr(keys: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (key, item ID) pairs in ascending ID order -> sorted unique keys,
+    # offsets and IDs grouped by key; the stable sort keeps IDs ascending
+    order = np.argsort(keys, kind="stable")
+    keys, ids = keys[order], ids[order]
+    uniq, start = np.unique(keys, return_index=True)
+    return uniq.astype(np.int32), np.append(start, len(keys)).astype(np.int64), ids.astype(np.int64)
+
+
+def _map_file(path: str, dtype: Any) -> np.ndarray:
+    # np.memmap cannot map an empty file
+    size = os.path.getsize(path) // np.dtype(dtype).itemsize
+    if size == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(size,))
+
+
+def _record(item_id: int, item: MemoryItem) -> Dict[str, Any]:
+    return {
+        "id": item_id,
+        "text": item.text,
+        "tags": list(item.tags),
+        "base_relevance": item.base_relevance,
+        "age_steps": item.age_steps,
+        "written_at": item.written_at,
+        "risk": item.risk,
+    }
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Tuple
+import zlib
+
+import numpy as np
+
+from src.text import tokenize
+
+Embedder = Callable[[str], np.ndarray]
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embedding: each token is hashed (crc32, stable
+    across processes) into one of `dim` buckets with a hashed sign, then the
+    vector is L2-normalized. Cosine similarity is then a weighted token
+    overlap, with no model and no network round trip.
+    """
+
+    def __init__(self, dim: int = 128) -> None:
+        if dim <= 0:
+            raise ValueError("dim must be > 0")
+        self.dim = dim
+
+    def __call__(self, text: str) -> np.ndarray:
+        v = np.zeros(self.dim, dtype=np.float32)
+        for tok in tokenize(text):
+            h = zlib.crc32(tok.encode("utf-8"))
+            v[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+
+class VectorIndex:
+    """
+    In-process vector index over memory texts (needs NumPy).
+
+    Vectors are L2-normalized float32 rows of one growable matrix, so cosine
+    similarity is a matrix-vector product. Search is exact brute force
+    until build_ivf() is called; after that it is IVF: rows are clustered
+    with spherical k-means and a query only scans the `n_probe` lists whose
+    centroids are closest (rows added after the build are always scanned).
+
+    Attach it to a MemoryStore (`MemoryStore(vectors=VectorIndex())`) and
+    MemoryGate.select_from_store(..., use_vectors=True) uses relevance() as
+    the base term instead of each memory's stored base_relevance.
+    """
+
+    def __init__(self, embed: Optional[Embedder] = None, dim: Optional[int] = None, n_probe: int = 8) -> None:
+        self.embed: Embedder = embed or HashingEmbedder(dim or 128)
+        self.dim = dim or getattr(self.embed, "dim", None) or len(self.embed(""))
+        self.n_probe = n_probe
+        self._matrix = np.zeros((1024, self.dim), dtype=np.float32)
+        self._n = 0
+        # IVF state: centroids, row IDs grouped by list, list offsets
+        self._centroids: Optional[np.ndarray] = None
+        self._list_ids = np.zeros(0, dtype=np.int64)
+        self._list_off = np.zeros(1, dtype=np.int64)
+        self._ivf_n = 0  # rows covered by the IVF lists
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def n_lists(self) -> int:
+        # IVF lists (0 until build_ivf)
+        return 0 if self._centroids is None else len(self._centroids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        # Zero-copy view of the stored rows
+        return self._matrix[: self._n]
+
+    def add(self, text: str) -> int:
+        return self.add_vector(self.embed(text))
+
+    def add_vector(self, vector: np.ndarray) -> int:
+        v = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        norm = float(np.linalg.norm(v))
+        if self._n == len(self._matrix):
+            grown = np.zeros((2 * len(self._matrix), self.dim), dtype=np.float32)
+            grown[: self._n] = self._matrix[: self._n]
+            self._matrix = grown
+        self._matrix[self._n] = v / norm if norm else v
+        self._n += 1
+        return self._n - 1
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+
+    def similarities(self, query: str, exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (row IDs, cosine similarities) of the rows the query is compared
+        with: every row when exact or without IVF, else the probed lists
+        plus rows added since build_ivf().
+        """
+        q = self._query_vector(query)
+        if exact or self._centroids is None:
+            return np.arange(self._n, dtype=np.int64), self.vectors @ q
+        ids = self._probe(q)
+        return ids, self._matrix[ids] @ q
+
+    def search(self, query: str, top_n: int = 10, exact: bool = False) -> List[Tuple[int, float]]:
+        """
+        The top_n most similar rows as (row ID, similarity), best first;
+        equal similarities keep row order.
+        """
+        ids, sims = self.similarities(query, exact=exact)
+        if top_n <= 0 or len(ids) == 0:
+            return []
+        part = np.arange(len(ids))
+        if top_n < len(ids):
+            # ids are ascending, so ties at the cut go to the lowest row IDs
+            kth = np.partition(sims, len(ids) - top_n)[len(ids) - top_n]
+            above = np.flatnonzero(sims > kth)
+            part = np.concatenate([above, np.flatnonzero(sims == kth)[: top_n - len(above)]])
+        part = part[np.lexsort((ids[part], -sims[part]))]
+        return [(int(ids[i]), float(sims[i])) for i in part]
+
+    def relevance(self, query: str, exact: bool = False) -> np.ndarray:
+        """
+        Per-row base relevance in [0, 1] for a query: cosine similarity
+        clipped at 0; rows outside the probed IVF lists get 0.
+        """
+        ids, sims = self.similarities(query, exact=exact)
+        if len(ids) == self._n:
+            return np.clip(sims, 0.0, 1.0).astype(np.float64)
+        out = np.zeros(self._n)
+        out[ids] = np.clip(sims, 0.0, 1.0)
+        return out
+
+    # -----------------------------
+    # IVF
+    # -----------------------------
+
+    def build_ivf(self, n_lists: Optional[int] = None, n_iter: int = 10, seed: int = 0) -> None:
+        """
+        Cluster the current rows into n_lists (default ~sqrt(n)) with
+        spherical k-means. Call again to re-cluster after many adds.
+        """
+        x = self.vectors
+        n = len(x)
+        if n == 0:
+            return
+        n_lists = min(n, n_lists or max(1, int(np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        centroids = x[rng.choice(n, size=n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assign = self._nearest(x, centroids)
+            sums = np.stack([np.bincount(assign, weights=x[:, d], minlength=n_lists) for d in range(self.dim)], axis=1)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            centroids = np.where(empty[:, None], centroids, sums / np.where(norms == 0, 1.0, norms)).astype(np.float32)
+        assign = self._nearest(x, centroids)
+
+        self._centroids = centroids
+        self._list_ids = np.argsort(assign, kind="stable").astype(np.int64)
+        self._list_off = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))]).astype(np.int64)
+        self._ivf_n = n
+
+    def _probe(self, q: np.ndarray) -> np.ndarray:
+        c = self._centroids
+        assert c is not None, "_probe needs build_ivf()"
+        n_probe = min(self.n_probe, len(c))
+        lists = np.argpartition(-(c @ q), n_probe - 1)[:n_probe]
+        off = self._list_off
+        parts = [self._list_ids[off[i] : off[i + 1]] for i in lists]
+        parts.append(np.arange(self._ivf_n, self._n, dtype=np.int64))
+        return np.sort(np.concatenate(parts))
+
+    @staticmethod
+    def _nearest(x: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        # Chunked argmax of x @ centroids.T, to bound the temporary matrix
+        out = np.empty(len(x), dtype=np.int64)
+        for start in range(0, len(x), chunk):
+            out[start : start + chunk] = np.argmax(x[start : start + chunk] @ centroids.T, axis=1)
+        return out
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        q = np.asarray(self.embed(query), dtype=np.float32).reshape(self.dim)
+        norm = float(np.linalg.norm(q))
+        return q / norm if norm else q
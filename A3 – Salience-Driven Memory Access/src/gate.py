@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Tuple
+import heapq
 
 from src.budget_adapter import BudgetMode, k_from_budget_mode
-from src.memory import MemoryItem
-from src.salience import SalienceScorer
+from src.memory import IndexedStore, MemoryItem
+from src.salience import FRAME_BOOSTS, SalienceScorer, np
 
 
 @dataclass
@@ -22,6 +23,8 @@ class MemoryGate:
 
     def __init__(self, scorer: SalienceScorer) -> None:
         self.scorer = scorer
+        # select_from_store: items scored on static terms only in the last call
+        self.last_static_only = 0
 
     def select(
         self,
@@ -29,13 +32,138 @@ class MemoryGate:
         task_query: str,
         foreground_frame: str,
         budget_mode: BudgetMode,
+        now: Optional[float] = None,
     ) -> List[ScoredMemory]:
+        """
+        `now`: store clock for recency (e.g. store.now); without it each
+        item's age_steps is used.
+        """
         k = k_from_budget_mode(budget_mode)
+        if k <= 0:
+            return []
+        if np is not None:
+            scores = self.scorer.score_batch(candidates, task_query=task_query, foreground_frame=foreground_frame, now=now)
+            return [ScoredMemory(item=candidates[i], score=float(scores[i])) for i in top_k_indices(scores, k)]
 
-        scored: List[ScoredMemory] = []
-        for c in candidates:
-            s = self.scorer.score(c, task_query=task_query, foreground_frame=foreground_frame)
-            scored.append(ScoredMemory(item=c, score=s))
+        return self.select_stream(candidates, task_query, foreground_frame, budget_mode, now)
 
-        scored.sort(key=lambda x: x.score, reverse=True)
-        return scored[:k]
+    def select_stream(
+        self,
+        candidates: Iterable[MemoryItem],
+        task_query: str,
+        foreground_frame: str,
+        budget_mode: BudgetMode,
+        now: Optional[float] = None,
+    ) -> List[ScoredMemory]:
+        """
+        select() over any iterable (a generator, a DB cursor, ...), consumed
+        once. Keeps only a size-k min-heap: a candidate that does not beat
+        the current k-th score is dropped without allocating anything for it,
+        so memory stays O(k) whatever the source size. Same items, order
+        and scores as the per-item score() path (ties keep input order).
+        """
+        k = k_from_budget_mode(budget_mode)
+        if k <= 0:
+            return []
+        score = self.scorer.scorer_for(task_query, foreground_frame, now)
+
+        # (score, -position, item): the heap root is the current k-th best;
+        # among equal scores the later candidate ranks lower
+        heap: List[Tuple[float, int, MemoryItem]] = []
+        for pos, c in enumerate(candidates):
+            s = score(c)
+            if len(heap) < k:
+                heapq.heappush(heap, (s, -pos, c))
+            elif s > heap[0][0]:
+                heapq.heapreplace(heap, (s, -pos, c))
+
+        heap.sort(reverse=True)
+        return [ScoredMemory(item=c, score=s) for s, _, c in heap]
+
+    def select_from_store(
+        self,
+        store: IndexedStore,
+        task_query: str,
+        foreground_frame: str,
+        budget_mode: BudgetMode,
+        use_vectors: bool = False,
+    ) -> List[ScoredMemory]:
+        """
+        select(store.all(), ..., now=store.now) without re-tokenizing
+        anything (needs NumPy).
+
+        Task overlap comes from the store's posting lists, so only items that
+        share a token with the query get a task-alignment term. Every other
+        item is scored on its static terms alone, in the same vectorized pass
+        (count in `last_static_only`), and only the best k of those are
+        merged with the overlapping items for the final cut.
+        Same items and order as select(); scores equal up to float rounding.
+
+        use_vectors=True takes the base term from the store's VectorIndex
+        (`store.vectors.relevance(task_query)`) instead of base_relevance.
+        The ranking then differs from select(), which has no vector base;
+        it equals score_batch(store.all(), ..., base_override=relevance).
+        """
+        vectors = getattr(store, "vectors", None) if use_vectors else None
+        if use_vectors and vectors is None:
+            raise ValueError("use_vectors=True needs a store with a VectorIndex (store.vectors)")
+        k = k_from_budget_mode(budget_mode)
+        n = len(store)
+        self.last_static_only = 0
+        if k <= 0 or n == 0:
+            return []
+        cfg = self.scorer.cfg
+
+        if vectors is not None:
+            base = vectors.relevance(task_query)
+        else:
+            base = np.clip(np.frombuffer(store.base, dtype=np.float64), 0.0, 1.0)
+        age = store.now - np.frombuffer(store.written, dtype=np.float64)
+        risk = np.clip(np.frombuffer(store.risk, dtype=np.float64), 0.0, 1.0)
+        hl = max(1, cfg.recency_half_life_steps)
+        head = cfg.w_base * base + cfg.w_recency * np.clip(0.5 ** (age / hl), 0.0, 1.0)
+
+        boost = np.zeros(n)
+        boost_tags, boost_value = FRAME_BOOSTS.get(foreground_frame.upper(), ((), 0.0))
+        for tag in boost_tags:
+            boost[np.frombuffer(store.tag_postings(tag), dtype=np.int64)] = boost_value
+
+        overlap = np.zeros(n)
+        query_ids, n_query = store.query_tokens(task_query)
+        for tid in query_ids:
+            overlap[np.frombuffer(store.postings(tid), dtype=np.int64)] += 1.0
+        hit = np.flatnonzero(overlap)
+
+        # Items without overlap: task term is 0, score is the static terms alone
+        miss = np.ones(n, dtype=bool)
+        miss[hit] = False
+        miss = np.flatnonzero(miss)
+        static = np.clip(head[miss] + cfg.w_risk * risk[miss] + boost[miss], 0.0, 1.0)
+        keep = miss[top_k_indices(static, k)] if len(miss) else miss
+        self.last_static_only = len(miss)
+
+        inter = overlap[hit]
+        union = n_query + np.frombuffer(store.n_tokens, dtype=np.int64)[hit] - inter
+        task = np.clip(inter / np.maximum(1.0, union), 0.0, 1.0)
+        full = np.clip(head[hit] + cfg.w_task * task + cfg.w_risk * risk[hit] + boost[hit], 0.0, 1.0)
+
+        ids = np.concatenate([hit, keep])
+        scores = np.concatenate([full, static[np.searchsorted(miss, keep)]])
+        order = np.argsort(ids, kind="stable")  # back to insertion order for tie-breaking
+        ids, scores = ids[order], scores[order]
+        return [ScoredMemory(item=store.get(int(ids[i])), score=float(scores[i])) for i in top_k_indices(scores, k)]
+
+
+def top_k_indices(scores: "np.ndarray", k: int) -> List[int]:
+    """
+    Indices of the k highest scores, best first, in O(n) with argpartition.
+    Equal scores keep input order (same as a stable descending sort).
+    """
+    n = len(scores)
+    if k >= n:
+        return np.argsort(-scores, kind="stable").tolist()
+    kth = scores[np.argpartition(scores, n - k)[n - k]]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[: k - len(above)]
+    idx = np.concatenate([above, ties])
+    return idx[np.lexsort((idx, -scores[idx]))].tolist()
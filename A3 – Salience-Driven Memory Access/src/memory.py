@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Tuple
+from array import array
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from src.text import tokenize
 
 
 @dataclass
@@ -11,24 +14,156 @@ class MemoryItem:
 
     base_relevance:
         Pretend this came from vector similarity or metadata match (0..1).
+        A store with a VectorIndex attached computes it per query instead.
     age_steps:
-        Proxy for recency (smaller = newer). In real system, use timestamps.
+        Proxy for recency (smaller = newer): the age when the memory is added.
     risk:
         How safety-sensitive this memory is (0..1).
+    written_at:
+        Store clock value when the memory was written. MemoryStore.add stores
+        a copy with it set to `now - age_steps` if missing (the caller's item
+        is not modified); from then on the age is
+        `now - written_at`, so the memory never has to be rewritten to age.
     """
     text: str
     tags: Tuple[str, ...] = ()
     base_relevance: float = 0.5
     age_steps: int = 10
     risk: float = 0.0
+    written_at: Optional[float] = None
+
+    def age_at(self, now: Optional[float] = None) -> float:
+        """
+        Age at clock value `now`; age_steps when either is unknown.
+        """
+        if now is None or self.written_at is None:
+            return self.age_steps
+        return now - self.written_at
+
+
+_EMPTY = array("q")
+
+
+class IndexedStore(Protocol):
+    """
+    What MemoryGate.select_from_store reads from a store: the clock, the
+    per-item columns and the posting lists, as buffers of float64 / int64
+    (array or NumPy). MemoryStore and DiskMemoryStore implement it.
+    """
+
+    now: float
+
+    @property
+    def base(self) -> Any: ...
+
+    @property
+    def written(self) -> Any: ...
+
+    @property
+    def risk(self) -> Any: ...
+
+    @property
+    def n_tokens(self) -> Any: ...
+
+    def __len__(self) -> int: ...
+
+    def get(self, item_id: int) -> MemoryItem: ...
+
+    def query_tokens(self, text: str) -> Tuple[List[int], int]: ...
+
+    def postings(self, token_id: int) -> Any: ...
+
+    def tag_postings(self, tag: str) -> Any: ...
 
 
 class MemoryStore:
-    def __init__(self) -> None:
+    """
+    Memories are treated as immutable once added. add() tokenizes each one
+    once (text tokens + tags) into interned token IDs and keeps:
+    - an inverted index token ID -> item IDs (ascending), for task overlap
+    - a tag -> item IDs index, for frame boosts
+    - flat columns (base_relevance, written_at, risk, distinct token count)
+    so the gate can score the store without touching the items.
+
+    `now` is the store clock (steps, or any monotonic time in the same unit
+    as the recency half-life). Advancing it with tick() ages every memory
+    at once; ages are computed as `now - written_at` when scoring.
+
+    `vectors`: optional src.embedding.VectorIndex; add() embeds each memory's
+    text into it, row i = item ID i (used by select_from_store with
+    use_vectors=True).
+    """
+
+    def __init__(self, vectors: Optional[Any] = None) -> None:
         self._items: List[MemoryItem] = []
+        self._vocab: Dict[str, int] = {}
+        self._postings: List[array] = []
+        self._tag_postings: Dict[str, array] = {}
+        self.now: float = 0
+        self.vectors = vectors
+        self.base = array("d")
+        self.written = array("d")
+        self.risk = array("d")
+        self.n_tokens = array("q")
 
-    def add(self, item: MemoryItem) -> None:
+    def add(self, item: MemoryItem) -> int:
+        """
+        Store the item; returns its ID (insertion index). An item without
+        written_at is stored as a copy stamped with the current clock.
+        """
+        item_id = len(self._items)
+        written_at = item.written_at
+        if written_at is None:
+            written_at = self.now - item.age_steps
+            item = replace(item, written_at=written_at)
         self._items.append(item)
+        ids = {self._token_id(t) for t in tokenize(item.text)}
+        ids.update(self._token_id(t) for t in item.tags)
+        for tid in ids:
+            self._postings[tid].append(item_id)
+        for tag in set(item.tags):
+            self._tag_postings.setdefault(tag, array("q")).append(item_id)
+        self.base.append(item.base_relevance)
+        self.written.append(written_at)
+        self.risk.append(item.risk)
+        self.n_tokens.append(len(ids))
+        if self.vectors is not None:
+            self.vectors.add(item.text)
+        return item_id
+
+    def tick(self, steps: float = 1) -> float:
+        """
+        Advance the clock; O(1) whatever the store size. Returns the new now.
+        """
+        self.now += steps
+        return self.now
 
     def all(self) -> List[MemoryItem]:
         return list(self._items)
+
+    def get(self, item_id: int) -> MemoryItem:
+        return self._items[item_id]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def query_tokens(self, text: str) -> Tuple[List[int], int]:
+        """
+        (IDs of the query's distinct tokens that occur in the store, number
+        of distinct query tokens including unseen ones).
+        """
+        toks = set(tokenize(text))
+        return [self._vocab[t] for t in toks if t in self._vocab], len(toks)
+
+    def postings(self, token_id: int) -> array:
+        return self._postings[token_id]
+
+    def tag_postings(self, tag: str) -> array:
+        return self._tag_postings.get(tag, _EMPTY)
+
+    def _token_id(self, token: str) -> int:
+        tid = self._vocab.get(token)
+        if tid is None:
+            tid = self._vocab[token] = len(self._postings)
+            self._postings.append(array("q"))
+        return tid
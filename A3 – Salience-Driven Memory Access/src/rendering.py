@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
 from src.gate import ScoredMemory
 
@@ -11,7 +11,7 @@ def print_header(title: str) -> None:
     print("=" * 80)
 
 
-def print_selected(title: str, selected: List[ScoredMemory]) -> None:
+def print_selected(title: str, selected: List[ScoredMemory], now: Optional[float] = None) -> None:
     print("\n" + "-" * 80)
     print(title)
     print("-" * 80)
@@ -20,5 +20,5 @@ def print_selected(title: str, selected: List[ScoredMemory]) -> None:
         return
     for i, sm in enumerate(selected, 1):
         tags = ",".join(sm.item.tags) if sm.item.tags else "-"
-        print(f"{i:02d}. score={sm.score:.3f} | risk={sm.item.risk:.2f} | age={sm.item.age_steps:>2d} | tags={tags}")
+        print(f"{i:02d}. score={sm.score:.3f} | risk={sm.item.risk:.2f} | age={sm.item.age_at(now):>2.0f} | tags={tags}")
         print(f"    {sm.item.text}")
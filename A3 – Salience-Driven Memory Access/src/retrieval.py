@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple
+import heapq
+import math
+
+from src.budget_adapter import BudgetMode, k_from_budget_mode
+from src.gate import ScoredMemory
+from src.memory import MemoryItem
+from src.salience import FRAME_BOOSTS, SalienceConfig, SalienceScorer, _clamp
+
+try:  # optional: vectorized static recompute and re-sort
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+# Slack for float rounding: the bound is summed in a different order than score()
+_EPS = 1e-9
+# Up to this many new items are inserted into the sorted order one by one
+# (bisect); a longer tail is merged with one stable re-sort
+_INSERT_MAX = 256
+
+
+class SalienceIndex:
+    """
+    Exact top-k salience retrieval with upper-bound pruning (WAND-style).
+
+    Every term of the score is bounded: base, recency and risk do not
+    depend on the query (the static part), task alignment lies in [0, 1]
+    and the frame boost is known from the item's tags. Items are kept
+    sorted by static part, so a query walks them best-first and:
+    - skips an item whose own bound (static + w_task + its boost) cannot
+      beat the current k-th score, without tokenizing its text
+    - stops once static + w_task + the frame's boost cannot beat it; every
+      remaining item is pruned
+
+    Static parts are computed at one clock value and reused while time
+    moves forward: ages only grow, so (with w_recency >= 0) they stay valid
+    upper bounds. They are recomputed after a half-life has passed, or when
+    the clock goes back or the scorer config changes, from columns of base,
+    risk and age captured at add() (vectorized with NumPy); indexed items
+    are treated as read-only.
+
+    add() is O(1): new items wait in an unsorted tail that the next search
+    merges into the sorted order, by bisect insertion when the tail is
+    short and by one stable re-sort otherwise.
+
+    search() returns the same items, order and scores as
+    MemoryGate.select_stream over the items in insertion order.
+    """
+
+    def __init__(self, scorer: SalienceScorer, items: Iterable[MemoryItem] = ()) -> None:
+        self.scorer = scorer
+        self._items: List[MemoryItem] = []
+        # static-part inputs per position (written_at is NaN when unknown)
+        self._base = array("d")
+        self._risk = array("d")
+        self._age_steps = array("d")
+        self._written = array("d")
+        self._static = array("d")
+        self._order: List[int] = []  # item positions, best static part first
+        self._order_key: List[float] = []  # -static part of each _order entry
+        self._tail: List[int] = []  # positions added since the last merge
+        self._cfg: SalienceConfig = scorer.cfg
+        self._now: Optional[float] = None  # clock value of the static parts
+        # last search(): items scored in full / skipped on their bound
+        self.last_scored = 0
+        self.last_pruned = 0
+        for it in items:
+            self.add(it)
+
+    def add(self, item: MemoryItem) -> int:
+        """
+        Index the item; returns its position (the tie-break order).
+        """
+        pos = len(self._items)
+        self._items.append(item)
+        self._base.append(item.base_relevance)
+        self._risk.append(item.risk)
+        self._age_steps.append(item.age_steps)
+        self._written.append(math.nan if item.written_at is None else item.written_at)
+        self._static.append(self._static_part(pos))
+        self._tail.append(pos)
+        return pos
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def search(
+        self, task_query: str, foreground_frame: str, budget_mode: BudgetMode, now: Optional[float] = None
+    ) -> List[ScoredMemory]:
+        k = k_from_budget_mode(budget_mode)
+        self.last_scored = self.last_pruned = 0
+        if k <= 0 or not self._items:
+            return []
+        self._refresh(now)
+
+        w_task = max(0.0, self._cfg.w_task)
+        boost_tags, boost_value = FRAME_BOOSTS.get(foreground_frame.upper(), ((), 0.0))
+        max_boost = max(0.0, boost_value)
+        score = self.scorer.scorer_for(task_query, foreground_frame, now)
+
+        # (score, -position, item): the root is the current k-th best
+        heap: List[Tuple[float, int, MemoryItem]] = []
+        items, static = self._items, self._static
+        scored = 0
+        for pos in self._order:
+            st = static[pos]
+            if len(heap) == k:
+                kth = heap[0][0]
+                if _clamp(st + w_task + max_boost) + _EPS < kth:
+                    break
+                it = items[pos]
+                own_boost = boost_value if any(t in boost_tags for t in it.tags) else 0.0
+                if _clamp(st + w_task + own_boost) + _EPS < kth:
+                    continue
+            else:
+                it = items[pos]
+            s = score(it)
+            scored += 1
+            entry = (s, -pos, it)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+        self.last_scored = scored
+        self.last_pruned = len(items) - scored
+        heap.sort(reverse=True)
+        return [ScoredMemory(item=c, score=s) for s, _, c in heap]
+
+    def _refresh(self, now: Optional[float]) -> None:
+        if self.scorer.cfg != self._cfg or not self._bounds_hold(now):
+            self._cfg = self.scorer.cfg
+            self._now = now
+            self._recompute_static()
+            self._sort()
+        elif len(self._tail) > _INSERT_MAX:
+            self._sort()
+        else:
+            # Tail positions exceed every sorted one, so bisect_right keeps
+            # equal static parts in position order
+            order, keys, static = self._order, self._order_key, self._static
+            for pos in self._tail:
+                i = bisect_right(keys, -static[pos])
+                order.insert(i, pos)
+                keys.insert(i, -static[pos])
+        self._tail = []
+
+    def _sort(self) -> None:
+        # Positions by static part descending, ties in position order
+        static = self._static
+        if np is not None:
+            neg = -np.frombuffer(static, dtype=np.float64)
+            order = np.argsort(neg, kind="stable")
+            self._order, self._order_key = order.tolist(), neg[order].tolist()
+        else:
+            self._order = sorted(range(len(static)), key=lambda i: -static[i])
+            self._order_key = [-static[i] for i in self._order]
+
+    def _recompute_static(self) -> None:
+        if np is None:
+            self._static = array("d", (self._static_part(pos) for pos in range(len(self._items))))
+            return
+        cfg = self._cfg
+        hl = max(1, cfg.recency_half_life_steps)
+        age = np.frombuffer(self._age_steps, dtype=np.float64)
+        if self._now is not None:
+            written = np.frombuffer(self._written, dtype=np.float64)
+            age = np.where(np.isnan(written), age, self._now - written)
+        static = (
+            cfg.w_base * np.clip(np.frombuffer(self._base, dtype=np.float64), 0.0, 1.0)
+            + cfg.w_recency * np.clip(0.5 ** (age / hl), 0.0, 1.0)
+            + cfg.w_risk * np.clip(np.frombuffer(self._risk, dtype=np.float64), 0.0, 1.0)
+        )
+        self._static = array("d", static.tobytes())
+
+    def _bounds_hold(self, now: Optional[float]) -> bool:
+        if now == self._now:
+            return True
+        if now is None or self._now is None or now < self._now or self._cfg.w_recency < 0:
+            return False
+        return now - self._now < max(1, self._cfg.recency_half_life_steps)
+
+    def _static_part(self, pos: int) -> float:
+        cfg = self._cfg
+        hl = max(1, cfg.recency_half_life_steps)
+        written = self._written[pos]
+        age = self._age_steps[pos] if self._now is None or math.isnan(written) else self._now - written
+        return (
+            cfg.w_base * _clamp(self._base[pos])
+            + cfg.w_recency * _clamp(0.5 ** (age / hl))
+            + cfg.w_risk * _clamp(self._risk[pos])
+        )
@@ -1,19 +1,21 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from src.memory import MemoryItem
+from src.text import tokenize as _tokenize
+
+try:  # optional: vectorized batch scoring
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
 
 
 def _clamp(x: float, lo: float = 0.0, hi: float = 1.0) -> float:
     return max(lo, min(hi, x))
 
 
-def _tokenize(s: str) -> List[str]:
-    return [t for t in "".join(ch.lower() if ch.isalnum() else " " for ch in s).split() if t]
-
-
 def _jaccard(a: List[str], b: List[str]) -> float:
     sa, sb = set(a), set(b)
     if not sa and not sb:
@@ -21,6 +23,13 @@ def _jaccard(a: List[str], b: List[str]) -> float:
     return len(sa & sb) / max(1, len(sa | sb))
 
 
+# Foreground frame -> (tags that earn the boost, boost added to the score)
+FRAME_BOOSTS: Dict[str, Tuple[Tuple[str, ...], float]] = {
+    "TASK": (("goal", "task"), 0.08),
+    "RISK": (("risk", "privacy"), 0.12),
+}
+
+
 @dataclass(frozen=True)
 class SalienceConfig:
     w_base: float = 0.45
@@ -49,39 +58,113 @@ class SalienceScorer:
     def __init__(self, cfg: SalienceConfig) -> None:
         self.cfg = cfg
 
-    def score(self, item: MemoryItem, task_query: str, foreground_frame: str) -> float:
-        # 1) base relevance (e.g., embedding similarity)
-        base = _clamp(item.base_relevance)
-
-        # 2) recency decay -> newer = higher
-        # A simple half-life curve using steps instead of timestamps
-        hl = max(1, self.cfg.recency_half_life_steps)
-        recency = 0.5 ** (item.age_steps / hl)
-        recency = _clamp(recency)
-
-        # 3) task alignment using a cheap token overlap
+    def score(self, item: MemoryItem, task_query: str, foreground_frame: str, now: Optional[float] = None) -> float:
+        """
+        `now`: store clock; ages come from item.age_at(now).
+        """
+        return self.scorer_for(task_query, foreground_frame, now)(item)
+
+    def scorer_for(
+        self, task_query: str, foreground_frame: str, now: Optional[float] = None
+    ) -> Callable[[MemoryItem], float]:
+        """
+        score() bound to one query, frame and clock value: the query is
+        tokenized once, so scoring a stream of candidates only tokenizes the
+        candidates.
+        """
+        cfg = self.cfg
+        hl = max(1, cfg.recency_half_life_steps)
         tq = _tokenize(task_query)
-        ti = _tokenize(item.text) + list(item.tags)
-        task_align = _jaccard(tq, ti)
-        task_align = _clamp(task_align)
-
-        # 4) risk signal
-        risk = _clamp(item.risk)
-
-        # 5) mild frame conditioning (optional)
-        # If foreground frame is TASK, boost items tagged "goal"/"task"
-        frame_boost = 0.0
-        if foreground_frame.upper() == "TASK" and any(t in ("goal", "task") for t in item.tags):
-            frame_boost = 0.08
-        if foreground_frame.upper() == "RISK" and any(t in ("risk", "privacy") for t in item.tags):
-            frame_boost = 0.12
+        boost_tags, boost_value = FRAME_BOOSTS.get(foreground_frame.upper(), ((), 0.0))
+
+        def score(item: MemoryItem) -> float:
+            # 1) base relevance (e.g., embedding similarity)
+            base = _clamp(item.base_relevance)
+
+            # 2) recency decay -> newer = higher
+            # A simple half-life curve over the age at `now`
+            recency = 0.5 ** (item.age_at(now) / hl)
+            recency = _clamp(recency)
+
+            # 3) task alignment using a cheap token overlap
+            ti = _tokenize(item.text) + list(item.tags)
+            task_align = _jaccard(tq, ti)
+            task_align = _clamp(task_align)
+
+            # 4) risk signal
+            risk = _clamp(item.risk)
+
+            # 5) mild frame conditioning (optional)
+            # If foreground frame is TASK, boost items tagged "goal"/"task" (see FRAME_BOOSTS)
+            frame_boost = 0.0
+            if any(t in boost_tags for t in item.tags):
+                frame_boost = boost_value
+
+            s = (
+                cfg.w_base * base
+                + cfg.w_recency * recency
+                + cfg.w_task * task_align
+                + cfg.w_risk * risk
+                + frame_boost
+            )
+
+            return _clamp(s)
+
+        return score
+
+    def score_batch(
+        self,
+        items: Sequence[MemoryItem],
+        task_query: str,
+        foreground_frame: str,
+        now: Optional[float] = None,
+        base_override: Optional[Any] = None,
+    ) -> Any:
+        """
+        score() for many items at once (needs NumPy): the query is tokenized
+        once and the weighted sum runs over arrays. Returns a float64 array
+        aligned with `items`, equal to score() up to float rounding.
+
+        `base_override`: per-item base relevance (e.g. VectorIndex.relevance) used
+        instead of item.base_relevance.
+        """
+        if np is None:
+            raise RuntimeError("score_batch requires numpy")
+        n = len(items)
+        base = np.empty(n)
+        age = np.empty(n)
+        written = np.full(n, np.nan)
+        risk = np.empty(n)
+        task_align = np.empty(n)
+        boost = np.zeros(n)
+
+        sq = set(_tokenize(task_query))
+        boost_tags, boost_value = FRAME_BOOSTS.get(foreground_frame.upper(), ((), 0.0))
+        for i, item in enumerate(items):
+            base[i] = item.base_relevance
+            age[i] = item.age_steps
+            if item.written_at is not None:
+                written[i] = item.written_at
+            risk[i] = item.risk
+            si = set(_tokenize(item.text))
+            si.update(item.tags)
+            if sq or si:
+                task_align[i] = len(sq & si) / max(1, len(sq | si))
+            else:
+                task_align[i] = 0.0
+            if boost_tags and any(t in boost_tags for t in item.tags):
+                boost[i] = boost_value
 
+        hl = max(1, self.cfg.recency_half_life_steps)
+        if now is not None:
+            age = np.where(np.isnan(written), age, now - written)
+        if base_override is not None:
+            base = np.asarray(base_override, dtype=np.float64)
         s = (
-            self.cfg.w_base * base
-            + self.cfg.w_recency * recency
-            + self.cfg.w_task * task_align
-            + self.cfg.w_risk * risk
-            + frame_boost
+            self.cfg.w_base * np.clip(base, 0.0, 1.0)
+            + self.cfg.w_recency * np.clip(0.5 ** (age / hl), 0.0, 1.0)
+            + self.cfg.w_task * np.clip(task_align, 0.0, 1.0)
+            + self.cfg.w_risk * np.clip(risk, 0.0, 1.0)
+            + boost
         )
-
-        return _clamp(s)
+        return np.clip(s, 0.0, 1.0)
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from typing import List
+import re
+
+_ASCII_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(s: str) -> List[str]:
+    """
+    Lowercased alphanumeric runs; everything else separates tokens.
+    """
+    if s.isascii():
+        # Same tokens as the general path below, without the per-char loop
+        return _ASCII_WORD.findall(s.lower())
+    return [t for t in "".join(ch.lower() if ch.isalnum() else " " for ch in s).split() if t]